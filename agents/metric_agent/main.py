@@ -8,6 +8,8 @@ sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(
 
 # Using explicit import with the full path to the agent module
 from agents.metric_agent.agent import MetricAgent
+from common.tools.instrumentation import start_metrics_server
+from common.tools.prometheus_tools import close_shared_sessions
 
 def main():
     # Load environment variables
@@ -19,6 +21,9 @@ def main():
     
     agent = MetricAgent(prometheus_url=prometheus_url, nats_server=nats_server)
     
+    # Expose tool latency and error metrics when METRICS_PORT is set
+    start_metrics_server()
+    
     print("[MetricAgent] Starting metric agent...")
     
     # Run the async listen method in the event loop
@@ -30,6 +35,8 @@ def main():
     finally:
         if agent.nats_client and agent.nats_client.is_connected:
             loop.run_until_complete(agent.nats_client.close())
+        # Drop the pooled Prometheus connections shared by every query tool
+        close_shared_sessions()
         loop.close()
 
 if __name__ == "__main__":
@@ -7,6 +7,7 @@ from dotenv import load_dotenv
 sys.path.append(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
 
 from agents.notification_agent.notification import NotificationAgent
+from common.tools.instrumentation import start_metrics_server
 
 def main():
     # Load environment variables
@@ -17,6 +18,9 @@ def main():
     
     agent = NotificationAgent(nats_server=nats_server)
     
+    # Expose tool latency and error metrics when METRICS_PORT is set
+    start_metrics_server()
+    
     print("[NotificationAgent] Starting notification agent...")
     
     # Run the async listen method in the event loop
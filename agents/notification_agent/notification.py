@@ -33,7 +33,7 @@ class NotificationAgent:
         self.llm = LLM(model=os.environ.get("OPENAI_MODEL", "gpt-4"))
         
         # Initialize notification tools
-        self.notification_tools = NotificationTools()
+        self.notification_tools = NotificationTools.instance()
         
         # Create a crewAI agent for notification management
         self.notification_manager = Agent(
@@ -0,0 +1,151 @@
+"""
+In-process caching helpers shared by the tools
+"""
+import gzip
+import hashlib
+import os
+import threading
+import time
+from collections import OrderedDict
+
+import orjson
+
+
+class TTLCache:
+    """Thread-safe LRU cache whose entries expire after a fixed time-to-live"""
+
+    def __init__(self, maxsize=1024, ttl=30, maxweight=None, weigher=None):
+        """
+        Initialize the cache
+
+        Args:
+            maxsize (int): Maximum number of entries kept before evicting the least recently used
+            ttl (float): Seconds an entry stays valid after it is stored
+            maxweight (float, optional): Maximum total weight of the entries, evicting the least
+                recently used beyond it; a value heavier than this on its own is not stored
+            weigher (callable, optional): Weight of a value, e.g. its size; defaults to 1 per entry
+        """
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self.maxweight = maxweight
+        self.weigher = weigher
+        self._data = OrderedDict()
+        self._weight = 0
+        self._lock = threading.Lock()
+
+    def get(self, key, default=None):
+        """
+        Return the cached value for key, or default if it is missing or expired
+        """
+        with self._lock:
+            item = self._data.get(key)
+            if item is None:
+                return default
+            expires_at, value, weight = item
+            if expires_at <= time.monotonic():
+                del self._data[key]
+                self._weight -= weight
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key, value, replace=None):
+        """
+        Store value under key, evicting the least recently used entry when full
+
+        Args:
+            key: Cache key
+            value: Value to store
+            replace (callable, optional): Called as replace(cached, value) when key already
+                holds an unexpired entry; that entry is kept unless it returns True
+        """
+        weight = self.weigher(value) if self.weigher else 1
+        with self._lock:
+            old = self._data.get(key)
+            if replace is not None and old is not None and old[0] > time.monotonic():
+                if not replace(old[1], value):
+                    return
+            old = self._data.pop(key, None)
+            if old is not None:
+                self._weight -= old[2]
+            if self.maxweight is not None and weight > self.maxweight:
+                return
+            self._data[key] = (time.monotonic() + self.ttl, value, weight)
+            self._weight += weight
+            while len(self._data) > self.maxsize or (
+                self.maxweight is not None and self._weight > self.maxweight
+            ):
+                self._weight -= self._data.popitem(last=False)[1][2]
+
+    def clear(self):
+        """Remove all entries"""
+        with self._lock:
+            self._data.clear()
+            self._weight = 0
+
+    def __len__(self):
+        with self._lock:
+            return len(self._data)
+
+
+class DiskCache:
+    """JSON values persisted as gzip files, which outlive the process; a file's mtime sets its age"""
+
+    def __init__(self, directory, ttl=3600):
+        """
+        Initialize the cache
+
+        Args:
+            directory (str): Directory holding the cache files; created on first write
+            ttl (float): Seconds a file stays valid after it is written
+        """
+        self.directory = directory
+        self.ttl = ttl
+
+    def _path(self, key):
+        digest = hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()
+        return os.path.join(self.directory, f"{digest}.json.gz")
+
+    def get(self, key, default=None):
+        """
+        Return the stored value for key, or default if it is missing, expired or unreadable
+        """
+        path = self._path(key)
+        try:
+            if time.time() - os.path.getmtime(path) >= self.ttl:
+                return default
+            with open(path, "rb") as f:
+                return orjson.loads(gzip.decompress(f.read()))
+        except (OSError, EOFError, ValueError):
+            return default
+
+    def set(self, key, value):
+        """
+        Store value under key. Write failures are ignored; the cache is only an optimization
+        """
+        path = self._path(key)
+        # Write to a private file and rename so readers never see a partial file
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            with open(tmp_path, "wb") as f:
+                f.write(gzip.compress(orjson.dumps(value), compresslevel=1))
+            os.replace(tmp_path, path)
+        except OSError:
+            try:
+                os.remove(tmp_path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """Remove all cache files"""
+        try:
+            names = os.listdir(self.directory)
+        except OSError:
+            return
+        for name in names:
+            if name.endswith(".json.gz"):
+                try:
+                    os.remove(os.path.join(self.directory, name))
+                except OSError:
+                    pass
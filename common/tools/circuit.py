@@ -0,0 +1,47 @@
+"""
+Circuit breaker shared by the tools that call external services
+"""
+import threading
+import time
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a service whose circuit breaker is open"""
+
+
+class CircuitBreaker:
+    """Stops calls to a service for a cooldown period after repeated transient failures"""
+
+    def __init__(self, failure_threshold=5, cooldown=30.0):
+        """
+        Initialize the breaker
+
+        Args:
+            failure_threshold (int): Consecutive transient failures that open the circuit
+            cooldown (float): Seconds the circuit stays open when no Retry-After is given
+        """
+        self.failure_threshold = failure_threshold
+        self.cooldown = cooldown
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        """Close the circuit and forget past failures"""
+        self.failures = 0
+        self.open_until = 0.0
+
+    def allow(self):
+        """Return True if calls may be made"""
+        return time.monotonic() >= self.open_until
+
+    def record_success(self):
+        with self._lock:
+            self.failures = 0
+
+    def record_failure(self, retry_after=None):
+        """Count a transient failure, opening the circuit when rate limited or past the threshold"""
+        with self._lock:
+            self.failures += 1
+            if retry_after is not None or self.failures >= self.failure_threshold:
+                cooldown = retry_after if retry_after is not None else self.cooldown
+                self.open_until = time.monotonic() + cooldown
@@ -0,0 +1,51 @@
+"""
+Prometheus self-instrumentation for the tools
+"""
+import os
+import logging
+from prometheus_client import Counter, Histogram, start_http_server
+
+logger = logging.getLogger(__name__)
+
+QUERY_HIST = Histogram(
+    "obsagent_promql_query_seconds",
+    "PromQL query latency",
+    ["kind"],
+    buckets=(0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 10)
+)
+
+CACHE_HITS = Counter(
+    "obsagent_promql_cache_hits_total",
+    "Prometheus API reads answered from a local cache",
+    ["cache"]
+)
+
+NOTIF_HIST = Histogram(
+    "obsagent_notification_send_seconds",
+    "Notification delivery latency",
+    ["kind"]
+)
+
+NOTIF_ERRORS = Counter(
+    "obsagent_notification_errors_total",
+    "Notifications that failed to deliver",
+    ["kind"]
+)
+
+
+def start_metrics_server(port=None):
+    """
+    Serve /metrics for this process if a port is configured
+
+    Args:
+        port (int, optional): Port to listen on. Defaults to the METRICS_PORT environment variable
+
+    Returns:
+        bool: True if the server was started
+    """
+    port = port or os.environ.get("METRICS_PORT")
+    if not port:
+        return False
+    start_http_server(int(port))
+    logger.info(f"Serving tool metrics on port {port}")
+    return True
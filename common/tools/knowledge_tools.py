@@ -8,8 +8,6 @@ import markdown
 from datetime import datetime
 from crewai.tools import tool
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class KnowledgeBaseTool:
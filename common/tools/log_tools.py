@@ -2,9 +2,17 @@
 Log tools for querying and analyzing log data from various sources
 """
 import os
-import json
+import re
+import random
+import orjson
+import numpy as np
 import requests
 import subprocess
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+from collections import Counter
+from itertools import chain
+from functools import lru_cache
 from datetime import datetime, timedelta
 from urllib.parse import urljoin
 from crewai.tools import tool
@@ -12,6 +20,50 @@ from crewai.tools import tool
 # Global variables for configuration
 LOKI_URL = os.environ.get("LOKI_URL", "http://loki:3100")
 LOKI_API_PATH = "/loki/api/v1/"
+# (connect, read) timeout in seconds for Loki requests
+LOKI_TIMEOUT = (3.05, float(os.environ.get("LOKI_READ_TIMEOUT", "30")))
+
+# Precompiled patterns used when analyzing log lines
+_ERROR_RE = re.compile(r'(?i)(error|exception|fail|fatal)[^:]*:?\s*([^\n]+)')
+_DURATION_RE = re.compile(r'duration=(\d+)')
+
+
+@lru_cache(maxsize=8192)
+def _extract_errors(log_line):
+    """Extract (error_type, message) pairs from a log line, memoized for repeated lines"""
+    return tuple(_ERROR_RE.findall(log_line))
+
+
+def _log_lines(logs, sample_size=None):
+    """
+    Return the log lines of a Loki result, optionally reservoir-sampled
+    
+    Args:
+        logs (dict): Loki query result containing log streams
+        sample_size (int, optional): Maximum number of lines to keep; all lines are returned if not set
+        
+    Returns:
+        list: Log lines (a uniform random sample when sample_size is exceeded)
+    """
+    lines = (entry[1] for stream in logs.get("result", []) for entry in stream.get("values", []))
+    if not sample_size:
+        return list(lines)
+    
+    # Algorithm R: keep the first k lines, then replace with decreasing probability
+    reservoir = []
+    for i, line in enumerate(lines):
+        if i < sample_size:
+            reservoir.append(line)
+        else:
+            j = random.randrange(i + 1)
+            if j < sample_size:
+                reservoir[j] = line
+    return reservoir
+
+
+def _decode(output):
+    """Decode raw subprocess output, tolerating invalid UTF-8"""
+    return output.decode("utf-8", errors="replace") if output else ""
 
 # Class-based tools needed by log_agent
 class LokiQueryTool:
@@ -20,6 +72,18 @@ class LokiQueryTool:
     def __init__(self, loki_url=None):
         self.loki_url = loki_url or LOKI_URL
         
+        # Keep-alive session that retries transient Loki failures with backoff
+        self.session = requests.Session()
+        adapter = HTTPAdapter(max_retries=Retry(
+            total=3,
+            backoff_factor=0.2,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False
+        ))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        
     @tool("Query logs from Loki using LogQL")
     def query_logs(self, query, start=None, end=None, limit=100, direction="backward"):
         """
@@ -52,15 +116,15 @@ class LokiQueryTool:
             "direction": direction
         }
             
-        response = requests.get(endpoint, params=params)
+        response = self.session.get(endpoint, params=params, timeout=LOKI_TIMEOUT)
         
         if response.status_code == 200:
-            return response.json()["data"]
+            return orjson.loads(response.content)["data"]
         else:
             raise Exception(f"Loki query failed with status {response.status_code}: {response.text}")
 
     @tool("Find error patterns in logs")
-    def find_error_patterns(self, namespace, service, start=None, end=None, limit=100):
+    def find_error_patterns(self, namespace, service, start=None, end=None, limit=100, sample_size=None):
         """
         Get common error patterns from logs
         
@@ -70,6 +134,7 @@ class LokiQueryTool:
             start (str, optional): Start time
             end (str, optional): End time
             limit (int, optional): Maximum number of logs to analyze
+            sample_size (int, optional): Analyze a random sample of at most this many lines
             
         Returns:
             dict: Common error patterns and their frequencies
@@ -77,24 +142,10 @@ class LokiQueryTool:
         query = f'{{namespace="{namespace}", service="{service}"}} |~ "(?i)(error|exception|fail|fatal)"'
         logs = self.query_logs(query, start, end, limit)
         
-        error_patterns = {}
-        for stream in logs.get("result", []):
-            for entry in stream.get("values", []):
-                log_line = entry[1]
-                # Extract error patterns using regex
-                import re
-                error_matches = re.findall(r'(?i)(error|exception|fail|fatal)[^:]*:?\s*([^\n]+)', log_line)
-                for error_type, message in error_matches:
-                    if error_type not in error_patterns:
-                        error_patterns[error_type] = {}
-                    if message not in error_patterns[error_type]:
-                        error_patterns[error_type][message] = 0
-                    error_patterns[error_type][message] += 1
-        
-        return error_patterns
+        return self._aggregate_error_patterns(logs, sample_size)
 
     @tool("Calculate service latency from logs")
-    def get_service_latency(self, namespace, service, start=None, end=None):
+    def get_service_latency(self, namespace, service, start=None, end=None, sample_size=None):
         """
         Calculate service latency from logs
         
@@ -103,6 +154,7 @@ class LokiQueryTool:
             service (str): Service name
             start (str, optional): Start time
             end (str, optional): End time
+            sample_size (int, optional): Estimate statistics from a random sample of at most this many lines
             
         Returns:
             dict: Latency statistics
@@ -110,25 +162,22 @@ class LokiQueryTool:
         query = f'{{namespace="{namespace}", service="{service}"}} |~ "duration=[0-9]+"'
         logs = self.query_logs(query, start, end)
         
-        latencies = []
-        for stream in logs.get("result", []):
-            for entry in stream.get("values", []):
-                log_line = entry[1]
-                import re
-                duration_match = re.search(r'duration=(\d+)', log_line)
-                if duration_match:
-                    latencies.append(int(duration_match.group(1)))
-        
-        if not latencies:
+        # Take the first duration of each line, as one line is one request, then compute
+        # the statistics in NumPy instead of over a list of Python ints
+        matches = map(_DURATION_RE.search, _log_lines(logs, sample_size))
+        durations = [match.group(1) for match in matches if match]
+        if not durations:
             return {"error": "No latency data found"}
             
+        latencies = np.array(durations, dtype=np.int64)
+        p95, p99 = np.percentile(latencies, (95, 99), method="nearest")
         return {
-            "count": len(latencies),
-            "min": min(latencies),
-            "max": max(latencies),
-            "avg": sum(latencies) / len(latencies),
-            "p95": sorted(latencies)[int(len(latencies) * 0.95)],
-            "p99": sorted(latencies)[int(len(latencies) * 0.99)]
+            "count": int(latencies.size),
+            "min": int(latencies.min()),
+            "max": int(latencies.max()),
+            "avg": float(latencies.mean()),
+            "p95": int(p95),
+            "p99": int(p99)
         }
 
     @tool("Get service error statistics")
@@ -160,9 +209,23 @@ class LokiQueryTool:
             "total_requests": total_requests,
             "error_count": error_count,
             "error_rate": error_count / total_requests if total_requests > 0 else 0,
-            "error_patterns": self.find_error_patterns(namespace, service, start, end, limit)
+            # Reuse the lines already screened by the error query instead of querying Loki again
+            "error_patterns": self._aggregate_error_patterns(error_logs)
         }
 
+    def _aggregate_error_patterns(self, logs, sample_size=None):
+        """Group error lines from a Loki result into {error_type: {message: count}}"""
+        # Count (error_type, message) pairs with a single flat counter; map/chain/Counter
+        # keep the per-line loop in C rather than in interpreted bytecode
+        counts = Counter(chain.from_iterable(map(_extract_errors, _log_lines(logs, sample_size))))
+        
+        # Reshape into {error_type: {message: count}} once at the end
+        error_patterns = {}
+        for (error_type, message), count in counts.items():
+            error_patterns.setdefault(error_type, {})[message] = count
+        
+        return error_patterns
+
 
 class PodLogTool:
     """Tool for retrieving logs from Kubernetes pods using kubectl"""
@@ -208,16 +271,17 @@ class PodLogTool:
             cmd.extend(["--since", since])
         
         try:
-            result = subprocess.run(cmd, capture_output=True, text=True, check=True)
+            # Read raw bytes and decode once, skipping the text-mode wrapper
+            result = subprocess.run(cmd, capture_output=True, check=True)
             logs = result.stdout
             
             if not logs:
                 return {"message": "No logs found"}
             
             # Simple parsing for now, can be improved to better organize logs by pod
-            return {"logs": logs}
+            return {"logs": _decode(logs)}
         except subprocess.CalledProcessError as e:
-            return {"error": f"Failed to retrieve logs: {e.stderr}"}
+            return {"error": f"Failed to retrieve logs: {_decode(e.stderr)}"}
     
     @tool("Get logs from pods with a specific label")
     def get_logs_by_label(self, namespace, label, tail=100, since=None):
@@ -249,37 +313,39 @@ class PodLogTool:
         cmd = ["kubectl", "get", "pods", "-n", namespace, "-o", "json"]
         
         try:
-            pod_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, universal_newlines=True)
-            pods_json = json.loads(pod_output)
+            # orjson parses the raw bytes directly, so no text decoding pass is needed
+            pod_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+            pods_json = orjson.loads(pod_output)
             
             # Extract the relevant pod information
             pods = []
-            for pod in pods_json.get("items", []):
+            for pod in pods_json.get("items") or ():
+                # Resolve the nested sections once per pod
+                metadata = pod.get("metadata") or {}
+                status = pod.get("status") or {}
                 pods.append({
-                    "name": pod.get("metadata", {}).get("name", ""),
-                    "status": pod.get("status", {}).get("phase", ""),
-                    "ready": self._is_pod_ready(pod),
-                    "restarts": self._get_restart_count(pod),
-                    "age": pod.get("metadata", {}).get("creationTimestamp", "")
+                    "name": metadata.get("name", ""),
+                    "status": status.get("phase", ""),
+                    "ready": self._is_pod_ready(status),
+                    "restarts": self._get_restart_count(status),
+                    "age": metadata.get("creationTimestamp", "")
                 })
                 
             return {"pods": pods}
                 
         except subprocess.CalledProcessError as e:
-            return {"error": str(e), "output": e.output}
+            return {"error": str(e), "output": _decode(e.output)}
 
-    def _is_pod_ready(self, pod):
-        """Check if a pod is ready based on its conditions"""
-        conditions = pod.get("status", {}).get("conditions", [])
-        for condition in conditions:
+    def _is_pod_ready(self, status):
+        """Check if a pod is ready based on the conditions in its status"""
+        for condition in status.get("conditions") or ():
             if condition.get("type") == "Ready":
                 return condition.get("status") == "True"
         return False
 
-    def _get_restart_count(self, pod):
-        """Get the restart count for a pod"""
-        container_statuses = pod.get("status", {}).get("containerStatuses", [])
-        return sum(status.get("restartCount", 0) for status in container_statuses)
+    def _get_restart_count(self, status):
+        """Get the total restart count from the container statuses in a pod status"""
+        return sum(container.get("restartCount", 0) for container in status.get("containerStatuses") or ())
 
 
 class FileLogTool:
@@ -313,20 +379,18 @@ class FileLogTool:
             
         try:
             # Get file content with optional line limit
-            log_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, universal_newlines=True)
+            log_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
             
-            # Apply pattern filtering if specified
+            # Apply pattern filtering if specified, decoding only the matching lines
             if pattern:
-                filtered_lines = []
-                for line in log_output.splitlines():
-                    if pattern in line:
-                        filtered_lines.append(line)
+                needle = pattern.encode("utf-8")
+                filtered_lines = [_decode(line) for line in log_output.splitlines() if needle in line]
                 return {"filtered_lines": filtered_lines, "count": len(filtered_lines)}
             else:
-                return {"content": log_output, "lines": log_output.count('\n') + 1}
+                return {"content": _decode(log_output), "lines": log_output.count(b'\n') + 1}
                 
         except subprocess.CalledProcessError as e:
-            return {"error": str(e), "output": e.output}
+            return {"error": str(e), "output": _decode(e.output)}
 
     @tool("Search for patterns in log files")
     def grep_logs(self, file_path, pattern, context_lines=0):
@@ -352,8 +416,8 @@ class FileLogTool:
         cmd.extend([pattern, file_path])
             
         try:
-            grep_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, universal_newlines=True)
-            lines = grep_output.splitlines()
+            grep_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+            lines = _decode(grep_output).splitlines()
             
             return {
                 "matches": lines,
@@ -364,7 +428,7 @@ class FileLogTool:
             if e.returncode == 1:  # grep returns 1 when no matches
                 return {"matches": [], "count": 0}
             else:
-                return {"error": str(e), "output": e.output}
+                return {"error": str(e), "output": _decode(e.output)}
 
     @tool("List log files in a directory")
     def list_log_files(self, directory, pattern="*.log"):
@@ -384,8 +448,8 @@ class FileLogTool:
         cmd = ["find", directory, "-type", "f", "-name", pattern]
             
         try:
-            find_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT, universal_newlines=True)
-            files = find_output.splitlines()
+            find_output = subprocess.check_output(cmd, stderr=subprocess.STDOUT)
+            files = _decode(find_output).splitlines()
             
             return {
                 "files": files,
@@ -393,4 +457,4 @@ class FileLogTool:
             }
                 
         except subprocess.CalledProcessError as e:
-            return {"error": str(e), "output": e.output}
\ No newline at end of file
+            return {"error": str(e), "output": _decode(e.output)}
\ No newline at end of file
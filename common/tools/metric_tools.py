@@ -1,20 +1,238 @@
 """
 Metric tools for analyzing and querying metrics data
 """
-import requests
+import asyncio
 import json
 import os
-from datetime import datetime, timedelta
+import re
+import threading
+import time
+import numpy as np
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime
 from urllib.parse import urljoin
 from crewai.tools import tool
-from common.tools.prometheus_tools import PrometheusTools
+from common.tools.prometheus_tools import (
+    PrometheusTools, PROM_QUERY_CACHE_SAMPLES, _shared_session, _cache_get, _cache_put, _duration_seconds,
+    _invalid_labels, _sample_count, _UNIT_SECONDS
+)
+from common.tools.cache import TTLCache
+from common.tools.instrumentation import QUERY_HIST
+
+# Upper bound on concurrent Prometheus queries issued by this process
+PROM_MAX_CONCURRENCY = int(os.environ.get("PROM_MAX_CONCURRENCY", "6"))
+
+# Shared pool for fanning out independent sub-queries, and a semaphore so that
+# parallel callers across services cannot stampede Prometheus
+_QUERY_POOL = ThreadPoolExecutor(max_workers=PROM_MAX_CONCURRENCY, thread_name_prefix="prom-query")
+_QUERY_SEMAPHORE = threading.BoundedSemaphore(PROM_MAX_CONCURRENCY)
+
+# Short-lived cache of successful query results so repeated polls skip Prometheus.
+# The only cache on this path: queries below it bypass the PrometheusTools cache
+PROM_CACHE_TTL = int(os.environ.get("PROM_CACHE_TTL", "30"))
+_QUERY_CACHE = TTLCache(
+    maxsize=1024, ttl=PROM_CACHE_TTL, maxweight=PROM_QUERY_CACHE_SAMPLES, weigher=_sample_count
+)
+
+# Relative start times such as "-30m"; the unit is optional and defaults to minutes
+_REL_RE = re.compile(r"^-(\d+)([smhdw]?)$")
+
+
+# Target upper bound on samples per series returned by the health range queries
+PROM_SAMPLE_BUDGET = int(os.environ.get("PROM_SAMPLE_BUDGET", "500"))
+
+# Finest step used for the health queries, matching the usual scrape interval
+_MIN_STEP_SECONDS = 15
+
+
+def _auto_step(duration, budget=PROM_SAMPLE_BUDGET):
+    """
+    Pick a step that keeps a range query over duration within the sample budget
+
+    Args:
+        duration (str): Lookback window such as "30m" or "7d"
+        budget (int): Maximum number of samples wanted per series
+
+    Returns:
+        str: Step in seconds, never finer than the scrape interval (e.g. "15s")
+    """
+    seconds = _duration_seconds(duration)
+    if not seconds:
+        return f"{_MIN_STEP_SECONDS}s"
+    return f"{max(_MIN_STEP_SECONDS, -(-seconds // budget))}s"
+
+
+# PromQL templates for the per-service health queries, with and without a namespace filter
+_CPU_NS = 'sum(rate(container_cpu_usage_seconds_total{{namespace="{ns}",pod=~"{svc}-.*"}}[5m]))'
+_CPU_NONS = 'sum(rate(container_cpu_usage_seconds_total{{pod=~"{svc}-.*"}}[5m]))'
+_MEMORY_NS = 'sum(container_memory_usage_bytes{{namespace="{ns}",pod=~"{svc}-.*"}})'
+_MEMORY_NONS = 'sum(container_memory_usage_bytes{{pod=~"{svc}-.*"}})'
+# The "> 0" filter on the denominator drops idle steps instead of returning NaN,
+# which would otherwise poison the mean/std computed by MetricAnalysisTool
+_ERROR_RATE_NS = ('sum(rate(http_requests_total{{namespace="{ns}",service="{svc}",status=~"5.*"}}[5m])) / '
+                  '(sum(rate(http_requests_total{{namespace="{ns}",service="{svc}"}}[5m])) > 0)')
+_ERROR_RATE_NONS = ('sum(rate(http_requests_total{{service="{svc}",status=~"5.*"}}[5m])) / '
+                    '(sum(rate(http_requests_total{{service="{svc}"}}[5m])) > 0)')
+
+
+def _cpu_query(service, namespace=None):
+    """PromQL for the CPU usage rate of a service's pods"""
+    return _CPU_NS.format(ns=namespace, svc=service) if namespace else _CPU_NONS.format(svc=service)
+
+
+def _memory_query(service, namespace=None):
+    """PromQL for the memory usage of a service's pods"""
+    return _MEMORY_NS.format(ns=namespace, svc=service) if namespace else _MEMORY_NONS.format(svc=service)
+
+
+def _error_rate_query(service, namespace=None):
+    """PromQL for the ratio of 5xx responses to all responses of a service"""
+    return _ERROR_RATE_NS.format(ns=namespace, svc=service) if namespace else _ERROR_RATE_NONS.format(svc=service)
+
+
+# Health kinds in the order they appear in the composite query
+_HEALTH_KINDS = ("cpu", "memory", "error_rate")
+
+
+def _composite_health_query(service, namespace=None):
+    """
+    Join the CPU, memory and error-rate expressions into one `or` query, tagging
+    each series with a `kind` label so the result can be split client-side
+    """
+    exprs = (
+        _cpu_query(service, namespace),
+        _memory_query(service, namespace),
+        _error_rate_query(service, namespace)
+    )
+    return " or ".join(
+        f'label_replace({expr}, "kind", "{kind}", "", "")'
+        for kind, expr in zip(_HEALTH_KINDS, exprs)
+    )
+
+
+def _split_by_kind(result):
+    """
+    Split a composite health query result into one result per kind
+
+    Args:
+        result (dict): Prometheus response for a query built by _composite_health_query
+
+    Returns:
+        dict: Mapping of kind to a response shaped like a standalone query for that kind
+    """
+    if result.get("status") != "success":
+        return {kind: result for kind in _HEALTH_KINDS}
+
+    data = result.get("data", {})
+    split = {kind: [] for kind in _HEALTH_KINDS}
+    for series in data.get("result", []):
+        metric = dict(series.get("metric", {}))
+        kind = metric.pop("kind", None)
+        if kind in split:
+            split[kind].append({**series, "metric": metric})
+
+    return {
+        kind: {
+            "status": "success",
+            "data": {"resultType": data.get("resultType"), "result": series_list}
+        }
+        for kind, series_list in split.items()
+    }
+
+
+def _summary_queries(expr, duration, step):
+    """
+    Wrap a PromQL expression in *_over_time subqueries so Prometheus reduces
+    the whole window to a handful of scalars instead of returning raw samples
+    """
+    window = f"({expr})[{duration}:{step}]"
+    return {
+        "avg": f"avg_over_time({window})",
+        "max": f"max_over_time({window})",
+        "min": f"min_over_time({window})"
+    }
+
+
+def _health_summary_queries(service, namespace, duration, step):
+    """
+    Build the instant queries behind get_service_health(summary=True)
+
+    Returns:
+        dict: Mapping of kind to a mapping of statistic name to PromQL
+    """
+    error_query = _error_rate_query(service, namespace)
+    summaries = {
+        "cpu": _summary_queries(_cpu_query(service, namespace), duration, step),
+        "memory": _summary_queries(_memory_query(service, namespace), duration, step),
+        "error_rate": _summary_queries(error_query, duration, step)
+    }
+    summaries["error_rate"]["error_steps"] = f"sum_over_time(({error_query} > bool 0)[{duration}:{step}])"
+    return summaries
+
+
+def _health_from_composite(service, namespace, result):
+    """Shape a composite health query response into the get_service_health result"""
+    split = _split_by_kind(result)
+    return {
+        "service": service,
+        "namespace": namespace,
+        "cpu": {"query_0": split["cpu"]},
+        "memory": {"query_0": split["memory"]},
+        "error_rate": {"query_0": split["error_rate"]}
+    }
+
+
+def _more_series(cached, result):
+    """
+    Conditional-replace policy for the query cache: a response only overwrites a live
+    entry when it has at least as many series, so a partial answer racing a complete one
+    does not evict it
+    """
+    return len(result["data"]["result"]) >= len(cached["data"]["result"])
+
+
+def _scalar_value(result):
+    """Extract the single value of an instant query result, or None if there is none"""
+    if result.get("status") != "success":
+        return None
+    series = result.get("data", {}).get("result", [])
+    if not series:
+        return None
+    try:
+        return float(series[0]["value"][1])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return None
+
+def _sample_array(samples):
+    """
+    Convert [timestamp, "value"] samples to an (n, 2) float array
+    
+    NumPy parses the value strings in one C loop; only a series containing a
+    non-numeric value falls back to converting sample by sample and dropping it.
+    """
+    try:
+        return np.array(samples, dtype=np.float64).reshape(-1, 2)
+    except (ValueError, TypeError):
+        pairs = []
+        for timestamp, value in samples:
+            try:
+                pairs.append((float(timestamp), float(value)))
+            except (ValueError, TypeError):
+                # Skip non-numeric values
+                continue
+        return np.array(pairs, dtype=np.float64).reshape(-1, 2)
+
 
 class PrometheusQueryTool:
     """Tool for querying Prometheus metrics"""
     
     def __init__(self, prometheus_url=None):
         self.prometheus_url = prometheus_url or os.environ.get('PROMETHEUS_URL', "http://prometheus:9090")
-        self.prometheus_tools = PrometheusTools(prometheus_url=self.prometheus_url)
+        # Session shared by all PrometheusQueryTool instances: one keep-alive connection per
+        # concurrent query, and fan-out waits for a free socket rather than opening
+        # connections that are discarded afterwards
+        self.session = _shared_session(pool_maxsize=PROM_MAX_CONCURRENCY, pool_block=True)
+        self.prometheus_tools = PrometheusTools(prometheus_url=self.prometheus_url, session=self.session)
     
     @tool("Query metrics from Prometheus using PromQL")
     def query_metrics(self, query=None, start=None, end=None, step=None):
@@ -30,37 +248,66 @@ class PrometheusQueryTool:
         Returns:
             dict: Query results
         """
+        return self._query_metrics(query, start, end, step)
+        
+    def _query_metrics(self, query=None, start=None, end=None, step=None):
+        """
+        Execute a Prometheus query without going through the tool wrapper,
+        for internal callers that already hold validated arguments
+        """
         if not query:
             return {
                 "status": "error",
                 "error": "Query parameter is required"
             }
             
-        # Handle relative time specifications like "-30m"
-        if start and start.startswith("-"):
-            try:
-                minutes = int(start[1:-1]) if start.endswith("m") else int(start[1:])
-                start_time = datetime.now() - timedelta(minutes=minutes)
-                start = start_time.timestamp()
-            except (ValueError, IndexError):
+        now = time.time()
+        
+        # Handle relative time specifications like "-30m", "-2h" or "-45s"
+        if isinstance(start, str) and start.startswith("-"):
+            match = _REL_RE.match(start)
+            if not match:
                 return {
                     "status": "error",
                     "error": f"Invalid start time format: {start}"
                 }
+            # A bare number such as "-30" is treated as minutes
+            start = now - int(match.group(1)) * _UNIT_SECONDS[match.group(2) or "m"]
                 
         # If end is not specified, use current time
         if not end:
-            end = datetime.now().timestamp()
+            end = now
             
-        # If we have both start and end, perform a range query
-        if start and end and step:
-            return self.prometheus_tools.range_query(query, start, end, step)
-        else:
-            # Otherwise, perform an instant query
-            return self.prometheus_tools.query(query)
+        is_range = bool(start and end and step)
+        
+        # Snap numeric range bounds down to the step grid so successive polls
+        # within one step produce the same query and hit the cache
+        step_seconds = _duration_seconds(step) if is_range else None
+        if step_seconds and isinstance(start, (int, float)) and isinstance(end, (int, float)):
+            start = start // step_seconds * step_seconds
+            end = end // step_seconds * step_seconds
+            
+        cache_key = (query, start, end, step) if is_range else (query,)
+        cached = _cache_get(_QUERY_CACHE, cache_key, "metric_query")
+        if cached is not None:
+            return cached
+            
+        with _QUERY_SEMAPHORE, QUERY_HIST.labels(kind="range" if is_range else "instant").time():
+            # If we have both start and end, perform a range query
+            if is_range:
+                result = self.prometheus_tools.range_query(query, start, end, step, cache=False)
+            else:
+                # Otherwise, perform an instant query
+                result = self.prometheus_tools.query(query, cache=False)
+                
+        # Only cache successful responses so errors are retried on the next call
+        if result.get("status") == "success":
+            _cache_put(_QUERY_CACHE, cache_key, result, replace=_more_series)
+            
+        return result
             
     @tool("Query CPU utilization metrics")
-    def get_cpu_metrics(self, service, namespace=None, duration="30m", step="15s"):
+    def get_cpu_metrics(self, service, namespace=None, duration="30m", step=None):
         """
         Get CPU utilization metrics for a service
         
@@ -68,31 +315,25 @@ class PrometheusQueryTool:
             service (str): The service name
             namespace (str, optional): The Kubernetes namespace
             duration (str, optional): Duration to look back (e.g., "30m")
-            step (str, optional): Step size for range query
+            step (str, optional): Step size for range query. Derived from duration when omitted
             
         Returns:
             dict: CPU metrics for the service
         """
-        queries = []
-        
-        if namespace:
-            queries.append(f'sum(rate(container_cpu_usage_seconds_total{{namespace="{namespace}",pod=~"{service}-.*"}}[5m]))')
-        else:
-            queries.append(f'sum(rate(container_cpu_usage_seconds_total{{pod=~"{service}-.*"}}[5m]))')
-            
-        results = {}
-        for i, query in enumerate(queries):
-            results[f"query_{i}"] = self.query_metrics(
-                query=query,
-                start=f"-{duration}", 
-                end=None,
-                step=step
-            )
-            
-        return results
+        invalid = _invalid_labels(service=service, namespace=namespace)
+        if invalid:
+            return invalid
+            
+        step = step or _auto_step(duration)
+        result = self._query_metrics(
+            query=_cpu_query(service, namespace),
+            start=f"-{duration}",
+            step=step
+        )
+        return {"query_0": result}
     
     @tool("Query memory usage metrics")
-    def get_memory_metrics(self, service, namespace=None, duration="30m", step="15s"):
+    def get_memory_metrics(self, service, namespace=None, duration="30m", step=None):
         """
         Get memory usage metrics for a service
         
@@ -100,31 +341,25 @@ class PrometheusQueryTool:
             service (str): The service name
             namespace (str, optional): The Kubernetes namespace
             duration (str, optional): Duration to look back (e.g., "30m")
-            step (str, optional): Step size for range query
+            step (str, optional): Step size for range query. Derived from duration when omitted
             
         Returns:
             dict: Memory metrics for the service
         """
-        queries = []
-        
-        if namespace:
-            queries.append(f'sum(container_memory_usage_bytes{{namespace="{namespace}",pod=~"{service}-.*"}})')
-        else:
-            queries.append(f'sum(container_memory_usage_bytes{{pod=~"{service}-.*"}})')
-            
-        results = {}
-        for i, query in enumerate(queries):
-            results[f"query_{i}"] = self.query_metrics(
-                query=query,
-                start=f"-{duration}", 
-                end=None,
-                step=step
-            )
-            
-        return results
+        invalid = _invalid_labels(service=service, namespace=namespace)
+        if invalid:
+            return invalid
+            
+        step = step or _auto_step(duration)
+        result = self._query_metrics(
+            query=_memory_query(service, namespace),
+            start=f"-{duration}",
+            step=step
+        )
+        return {"query_0": result}
         
     @tool("Query error rate metrics")
-    def get_error_rate(self, service, namespace=None, duration="30m", step="15s"):
+    def get_error_rate(self, service, namespace=None, duration="30m", step=None):
         """
         Get error rate metrics for a service
         
@@ -132,31 +367,25 @@ class PrometheusQueryTool:
             service (str): The service name
             namespace (str, optional): The Kubernetes namespace
             duration (str, optional): Duration to look back (e.g., "30m")
-            step (str, optional): Step size for range query
+            step (str, optional): Step size for range query. Derived from duration when omitted
             
         Returns:
             dict: Error rate metrics for the service
         """
-        queries = []
-        
-        if namespace:
-            queries.append(f'sum(rate(http_requests_total{{namespace="{namespace}",service="{service}",status=~"5.*"}}[5m])) / sum(rate(http_requests_total{{namespace="{namespace}",service="{service}"}}[5m]))')
-        else:
-            queries.append(f'sum(rate(http_requests_total{{service="{service}",status=~"5.*"}}[5m])) / sum(rate(http_requests_total{{service="{service}"}}[5m]))')
-            
-        results = {}
-        for i, query in enumerate(queries):
-            results[f"query_{i}"] = self.query_metrics(
-                query=query,
-                start=f"-{duration}", 
-                end=None,
-                step=step
-            )
-            
-        return results
+        invalid = _invalid_labels(service=service, namespace=namespace)
+        if invalid:
+            return invalid
+            
+        step = step or _auto_step(duration)
+        result = self._query_metrics(
+            query=_error_rate_query(service, namespace),
+            start=f"-{duration}",
+            step=step
+        )
+        return {"query_0": result}
 
     @tool("Get service health metrics")
-    def get_service_health(self, service, namespace=None, duration="30m", step="15s"):
+    def get_service_health(self, service, namespace=None, duration="30m", step=None, summary=False):
         """
         Get overall health metrics for a service
         
@@ -164,22 +393,145 @@ class PrometheusQueryTool:
             service (str): The service name
             namespace (str, optional): The Kubernetes namespace
             duration (str, optional): Duration to look back (e.g., "30m")
-            step (str, optional): Step size for range query
+            step (str, optional): Step size for range query. Derived from duration when omitted
+            summary (bool, optional): Return avg/max/min scalars computed by Prometheus
+                instead of raw range series
             
         Returns:
             dict: Health metrics including CPU, memory, and error rates
         """
-        cpu_metrics = self.get_cpu_metrics(service, namespace, duration, step)
-        memory_metrics = self.get_memory_metrics(service, namespace, duration, step)
-        error_metrics = self.get_error_rate(service, namespace, duration, step)
+        invalid = _invalid_labels(service=service, namespace=namespace)
+        if invalid:
+            return invalid
+            
+        step = step or _auto_step(duration)
+        
+        if summary:
+            return self._get_service_health_summary(service, namespace, duration, step)
+            
+        # Fetch all three kinds in a single round trip and split them by label
+        result = self._query_metrics(
+            query=_composite_health_query(service, namespace),
+            start=f"-{duration}",
+            step=step
+        )
+        return _health_from_composite(service, namespace, result)
+        
+    def _get_service_health_summary(self, service, namespace, duration, step):
+        """
+        Compute health summaries server-side with instant *_over_time queries
         
-        return {
+        Args:
+            service (str): The service name
+            namespace (str, optional): The Kubernetes namespace
+            duration (str): Window to summarize (e.g., "30m")
+            step (str): Subquery resolution
+            
+        Returns:
+            dict: Scalar avg/max/min per metric, plus the number of steps with errors
+        """
+        summaries = _health_summary_queries(service, namespace, duration, step)
+        
+        futures = {
+            kind: {
+                stat: _QUERY_POOL.submit(self._query_metrics, query)
+                for stat, query in queries.items()
+            }
+            for kind, queries in summaries.items()
+        }
+        
+        result = {
             "service": service,
             "namespace": namespace,
-            "cpu": cpu_metrics,
-            "memory": memory_metrics,
-            "error_rate": error_metrics
+            "duration": duration
         }
+        for kind, stats in futures.items():
+            result[kind] = {stat: _scalar_value(future.result()) for stat, future in stats.items()}
+            
+        return result
+        
+    async def aquery_metrics(self, query=None, start=None, end=None, step=None):
+        """
+        Execute a Prometheus query without blocking the running event loop
+        
+        The request runs on the shared query pool over the same pooled session
+        and cache as query_metrics.
+        
+        Args:
+            query (str): The PromQL query to execute
+            start (str, optional): Start time for range query (e.g., "-30m")
+            end (str, optional): End time for range query (default: now)
+            step (str, optional): Step size for range queries (e.g., "15s")
+            
+        Returns:
+            dict: Query results
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(_QUERY_POOL, self._query_metrics, query, start, end, step)
+        
+    async def aquery_many(self, queries, start=None, end=None, step=None):
+        """
+        Execute several Prometheus queries concurrently from an event loop
+        
+        Args:
+            queries (dict): Mapping of name to PromQL query
+            start (str, optional): Start time applied to every query (e.g., "-30m")
+            end (str, optional): End time applied to every query (default: now)
+            step (str, optional): Step size applied to every query (e.g., "15s")
+            
+        Returns:
+            dict: Mapping of name to query results
+        """
+        names = list(queries)
+        responses = await asyncio.gather(
+            *(self.aquery_metrics(queries[name], start, end, step) for name in names)
+        )
+        return dict(zip(names, responses))
+        
+    async def aget_service_health(self, service, namespace=None, duration="30m", step=None, summary=False):
+        """
+        Async counterpart of get_service_health for callers already inside an event loop
+        
+        Args:
+            service (str): The service name
+            namespace (str, optional): The Kubernetes namespace
+            duration (str, optional): Duration to look back (e.g., "30m")
+            step (str, optional): Step size for range query. Derived from duration when omitted
+            summary (bool, optional): Return avg/max/min scalars computed by Prometheus
+                instead of raw range series
+            
+        Returns:
+            dict: Health metrics including CPU, memory, and error rates
+        """
+        invalid = _invalid_labels(service=service, namespace=namespace)
+        if invalid:
+            return invalid
+            
+        step = step or _auto_step(duration)
+        
+        if not summary:
+            result = await self.aquery_metrics(
+                query=_composite_health_query(service, namespace),
+                start=f"-{duration}",
+                step=step
+            )
+            return _health_from_composite(service, namespace, result)
+            
+        summaries = _health_summary_queries(service, namespace, duration, step)
+        keys = [(kind, stat) for kind, queries in summaries.items() for stat in queries]
+        responses = await asyncio.gather(
+            *(self.aquery_metrics(query=summaries[kind][stat]) for kind, stat in keys)
+        )
+        
+        result = {
+            "service": service,
+            "namespace": namespace,
+            "duration": duration
+        }
+        for (kind, stat), response in zip(keys, responses):
+            result.setdefault(kind, {})[stat] = _scalar_value(response)
+            
+        return result
 
 class MetricAnalysisTool:
     """Tool for analyzing metric data"""
@@ -320,40 +672,38 @@ class MetricAnalysisTool:
         return results
     
     def _extract_metric_data(self, metrics):
-        """Extract and format metric data from Prometheus response"""
-        data = []
+        """
+        Extract metric data from a Prometheus response in a single pass
+        
+        Returns:
+            dict: Mapping of metric name to a (timestamps, values) pair of NumPy arrays
+        """
+        grouped = {}
         if metrics.get("status") == "success":
             result_data = metrics.get("data", {}).get("result", [])
             
             for series in result_data:
                 metric_name = series.get("metric", {}).get("__name__", "unknown")
                 
-                # For instant queries
+                # Instant queries carry a single "value", range queries a list of "values"
                 if "value" in series:
-                    timestamp, value = series["value"]
-                    try:
-                        data.append({
-                            "metric": metric_name,
-                            "timestamp": timestamp,
-                            "value": float(value)
-                        })
-                    except (ValueError, TypeError):
-                        # Skip non-numeric values
-                        continue
-                
-                # For range queries
+                    samples = (series["value"],)
                 elif "values" in series:
-                    for timestamp, value in series["values"]:
-                        try:
-                            data.append({
-                                "metric": metric_name,
-                                "timestamp": timestamp,
-                                "value": float(value)
-                            })
-                        except (ValueError, TypeError):
-                            # Skip non-numeric values
-                            continue
-        return data
+                    samples = series["values"]
+                else:
+                    continue
+                    
+                pairs = _sample_array(samples)
+                # Skip "NaN"/"+Inf" samples, e.g. from a ratio over zero traffic
+                pairs = pairs[np.isfinite(pairs[:, 1])]
+                grouped.setdefault(metric_name, []).append(pairs)
+                    
+        result = {}
+        for metric, chunks in grouped.items():
+            pairs = chunks[0] if len(chunks) == 1 else np.concatenate(chunks)
+            if len(pairs):
+                result[metric] = (pairs[:, 0], pairs[:, 1])
+        return result
     
     def _analyze_trend(self, data):
         """Analyze trend in metric data"""
@@ -362,19 +712,8 @@ class MetricAnalysisTool:
             
         findings = []
         
-        # Group by metric
-        metrics = {}
-        for item in data:
-            metric = item["metric"]
-            if metric not in metrics:
-                metrics[metric] = []
-            metrics[metric].append(item)
-            
         # Analyze each metric
-        for metric, values in metrics.items():
-            # Sort by timestamp
-            values.sort(key=lambda x: x["timestamp"])
-            
+        for metric, (timestamps, values) in data.items():
             if len(values) < 2:
                 findings.append({
                     "type": "info",
@@ -383,9 +722,10 @@ class MetricAnalysisTool:
                 })
                 continue
                 
-            # Calculate simple linear regression
-            start_value = values[0]["value"]
-            end_value = values[-1]["value"]
+            # Order by timestamp and compare the first and last values
+            order = np.argsort(timestamps, kind="stable")
+            start_value = float(values[order[0]])
+            end_value = float(values[order[-1]])
             change = end_value - start_value
             
             if change > 0:
@@ -422,16 +762,8 @@ class MetricAnalysisTool:
             
         findings = []
         
-        # Group by metric
-        metrics = {}
-        for item in data:
-            metric = item["metric"]
-            if metric not in metrics:
-                metrics[metric] = []
-            metrics[metric].append(item)
-            
         # Analyze each metric
-        for metric, values in metrics.items():
+        for metric, (timestamps, values) in data.items():
             if len(values) < 3:
                 findings.append({
                     "type": "info",
@@ -440,21 +772,30 @@ class MetricAnalysisTool:
                 })
                 continue
                 
-            # Calculate mean and standard deviation
-            data_values = [item["value"] for item in values]
-            mean = sum(data_values) / len(data_values)
-            variance = sum((x - mean) ** 2 for x in data_values) / len(data_values)
-            std_dev = variance ** 0.5
-            
-            # Identify anomalies (values more than 2 standard deviations from mean)
-            anomalies = []
-            for item in values:
-                if abs(item["value"] - mean) > 2 * std_dev:
-                    anomalies.append({
-                        "timestamp": item["timestamp"],
-                        "value": item["value"],
-                        "deviation": (item["value"] - mean) / std_dev
-                    })
+            # Calculate mean and (population) standard deviation
+            mean = float(values.mean())
+            std_dev = float(values.std())
+            
+            # Select the quartiles in linear time rather than sorting the series
+            lower, upper = len(values) // 4, 3 * len(values) // 4
+            q1, q3 = np.partition(values, (lower, upper))[[lower, upper]]
+            iqr = q3 - q1
+            
+            # Identify anomalies (values outside Tukey's fences, 1.5 IQR beyond
+            # the quartiles), which unlike mean +/- 2 sigma are not skewed by
+            # the outliers themselves
+            mask = (values < q1 - 1.5 * iqr) | (values > q3 + 1.5 * iqr)
+            deviations = values - mean
+            anomalies = [
+                {
+                    "timestamp": timestamp,
+                    "value": value,
+                    "deviation": deviation / std_dev
+                }
+                for timestamp, value, deviation in zip(
+                    timestamps[mask].tolist(), values[mask].tolist(), deviations[mask].tolist()
+                )
+            ]
                     
             if anomalies:
                 findings.append({
@@ -463,6 +804,8 @@ class MetricAnalysisTool:
                     "message": f"Found {len(anomalies)} anomalies",
                     "mean": mean,
                     "std_dev": std_dev,
+                    "q1": float(q1),
+                    "q3": float(q3),
                     "anomalies": anomalies
                 })
             else:
@@ -471,7 +814,9 @@ class MetricAnalysisTool:
                     "metric": metric,
                     "message": "No anomalies detected",
                     "mean": mean,
-                    "std_dev": std_dev
+                    "std_dev": std_dev,
+                    "q1": float(q1),
+                    "q3": float(q3)
                 })
                 
         return findings
@@ -483,27 +828,19 @@ class MetricAnalysisTool:
             
         findings = []
         
-        # Group by metric
-        metrics = {}
-        for item in data:
-            metric = item["metric"]
-            if metric not in metrics:
-                metrics[metric] = []
-            metrics[metric].append(item)
-            
         # Analyze each metric
-        for metric, values in metrics.items():
+        for metric, (timestamps, values) in data.items():
             # Count values above threshold
-            above_threshold = [item for item in values if item["value"] > threshold]
+            above_threshold = int(np.count_nonzero(values > threshold))
             
             if above_threshold:
                 findings.append({
                     "type": "threshold",
                     "metric": metric,
-                    "message": f"{len(above_threshold)} of {len(values)} values exceed threshold of {threshold}",
+                    "message": f"{above_threshold} of {len(values)} values exceed threshold of {threshold}",
                     "threshold": threshold,
-                    "count": len(above_threshold),
-                    "percentage": len(above_threshold) / len(values) * 100
+                    "count": above_threshold,
+                    "percentage": above_threshold / len(values) * 100
                 })
             else:
                 findings.append({
@@ -522,24 +859,14 @@ class MetricAnalysisTool:
             
         findings = []
         
-        # Group by metric
-        metrics = {}
-        for item in data:
-            metric = item["metric"]
-            if metric not in metrics:
-                metrics[metric] = []
-            metrics[metric].append(item)
-            
         # Analyze each metric
-        for metric, values in metrics.items():
-            if not values:
+        for metric, (timestamps, values) in data.items():
+            if not len(values):
                 continue
                 
             # Calculate basic statistics
-            data_values = [item["value"] for item in values]
-            mean = sum(data_values) / len(data_values)
-            min_value = min(data_values)
-            max_value = max(data_values)
+            min_value = float(values.min())
+            max_value = float(values.max())
             
             findings.append({
                 "type": "statistics",
@@ -547,19 +874,19 @@ class MetricAnalysisTool:
                 "count": len(values),
                 "min": min_value,
                 "max": max_value,
-                "mean": mean,
+                "mean": float(values.mean()),
                 "range": max_value - min_value
             })
             
             # Check for zero values
-            zero_values = [item for item in values if item["value"] == 0]
-            if zero_values:
+            zero_count = int(np.count_nonzero(values == 0))
+            if zero_count:
                 findings.append({
                     "type": "warning",
                     "metric": metric,
-                    "message": f"Found {len(zero_values)} zero values out of {len(values)} total values",
-                    "count": len(zero_values),
-                    "percentage": len(zero_values) / len(values) * 100
+                    "message": f"Found {zero_count} zero values out of {len(values)} total values",
+                    "count": zero_count,
+                    "percentage": zero_count / len(values) * 100
                 })
                 
-        return findings
\ No newline at end of file
+        return findings
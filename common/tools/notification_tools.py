@@ -1,20 +1,187 @@
 import os
 import json
 import logging
+import queue
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache, wraps
 from typing import Dict, Any, Optional
-from slack_sdk import WebClient
-from slack_sdk.errors import SlackApiError
-from pdpyras import APISession as PagerDutyClient
-from webexteamssdk import WebexTeamsAPI
+from requests.adapters import HTTPAdapter
 from crewai.tools import tool
+from common.tools.circuit import CircuitBreaker, CircuitOpenError
+from common.tools.instrumentation import NOTIF_HIST, NOTIF_ERRORS
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# SDK clients shared across NotificationTools instances, keyed by (platform, token),
+# so agents that recreate their tools keep reusing the same connection pools
+_CLIENTS = {}
+_CLIENTS_LOCK = threading.Lock()
+
+
+def _shared_client(platform, token, factory):
+    """
+    Return the cached client for a platform and token, creating it on first use
+
+    Args:
+        platform (str): Platform name used to namespace the cache key
+        token (str): Credential the client is bound to
+        factory (callable): Called with no arguments to build the client
+
+    Returns:
+        The shared client instance
+    """
+    key = (platform, token)
+    with _CLIENTS_LOCK:
+        client = _CLIENTS.get(key)
+        if client is None:
+            client = factory()
+            _CLIENTS[key] = client
+        return client
+
+def _build_pagerduty_client(token):
+    """
+    Create a PagerDuty API session that keeps its connections alive between incidents
+
+    pdpyras.APISession is a requests.Session, so it is given a connection pool sized
+    for concurrent multi-channel sends; pdpyras applies its own retry policy on top.
+    """
+    from pdpyras import APISession as PagerDutyClient
+    client = PagerDutyClient(token)
+    client.headers["Connection"] = "keep-alive"
+    client.mount("https://", HTTPAdapter(pool_connections=4, pool_maxsize=8))
+    return client
+
+# Shared pool for delivering one notification to several platforms at once
+_SEND_POOL = ThreadPoolExecutor(max_workers=4, thread_name_prefix="notify")
+
+# Seconds to keep collecting queued Slack messages before posting them as one batch
+SLACK_BATCH_WINDOW = float(os.environ.get("SLACK_BATCH_WINDOW", "0.5"))
+
+# Slack rejects messages with more than 50 blocks, so larger batches are split
+SLACK_MAX_BLOCKS = 50
+
+# Fixed part of the mrkdwn text object used for every Slack section block
+_SLACK_TEXT_TEMPLATE = {"type": "mrkdwn"}
+
+@lru_cache(maxsize=256)
+def _slack_blocks(message):
+    """
+    Build the section blocks for a message once; alert storms repeat the same text.
+    The cached block dicts are shared between calls and must not be mutated.
+    """
+    return ({"type": "section", "text": {**_SLACK_TEXT_TEMPLATE, "text": message}},)
+
+
+def _collapse_repeats(messages):
+    """Merge identical messages from one batch into a single entry noting how often it repeated"""
+    counts = {}
+    for message in messages:
+        counts[message] = counts.get(message, 0) + 1
+    return [
+        message if count == 1 else f"{message}\n_(repeated {count} times)_"
+        for message, count in counts.items()
+    ]
+
+
+# HTTP statuses worth retrying: rate limiting and transient server errors
+_RETRY_STATUSES = {429, 500, 502, 503, 504}
+
+# Consecutive transient failures after which a platform's circuit opens, and
+# how long it stays open when the platform gives no Retry-After hint
+CIRCUIT_FAILURE_THRESHOLD = 5
+CIRCUIT_COOLDOWN = 30.0
+
+# Longest wait between retries. Retries sleep on the caller's thread, so a platform
+# asking for a longer Retry-After opens its circuit instead of being waited out
+RETRY_MAX_DELAY = float(os.environ.get("NOTIFY_RETRY_MAX_DELAY", "2"))
+
+
+# One breaker per platform, shared like the clients themselves
+_BREAKERS = {
+    platform: CircuitBreaker(CIRCUIT_FAILURE_THRESHOLD, CIRCUIT_COOLDOWN)
+    for platform in ("slack", "pagerduty", "webex")
+}
+
+
+def _error_status(error):
+    """Best-effort HTTP status code of an SDK exception"""
+    status = getattr(error, "status_code", None)
+    if status is None:
+        status = getattr(getattr(error, "response", None), "status_code", None)
+    return status if isinstance(status, int) else None
+
+
+def _retry_after(error):
+    """Seconds requested by a Retry-After header on an SDK exception, if any"""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("Retry-After"))
+    except (TypeError, ValueError):
+        return None
+
+
+def _with_retries(platform, max_attempts=3, base=0.25):
+    """
+    Retry a notification call on 429/5xx errors with exponential backoff and jitter,
+    honoring Retry-After up to RETRY_MAX_DELAY, and guard it with the platform's
+    circuit breaker. A longer Retry-After opens the circuit for that long and fails
+    the call at once.
+
+    Args:
+        platform (str): Platform whose circuit breaker guards the call
+        max_attempts (int): Total attempts before the error is re-raised
+        base (float): Initial backoff in seconds, doubled after each attempt
+    """
+    def decorator(func):
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            breaker = _BREAKERS[platform]
+            if not breaker.allow():
+                raise CircuitOpenError(f"{platform} circuit is open after repeated failures")
+                
+            for attempt in range(max_attempts):
+                try:
+                    result = func(*args, **kwargs)
+                except Exception as e:
+                    status = _error_status(e)
+                    if status not in _RETRY_STATUSES:
+                        raise
+                    retry_after = _retry_after(e)
+                    if retry_after is not None and retry_after > RETRY_MAX_DELAY:
+                        breaker.record_failure(retry_after)
+                        raise
+                    if attempt == max_attempts - 1:
+                        breaker.record_failure(retry_after if status == 429 else None)
+                        raise
+                    if retry_after is not None:
+                        delay = retry_after
+                    else:
+                        delay = min(base * 2 ** attempt + random.uniform(0, base), RETRY_MAX_DELAY)
+                    logger.warning(f"{platform} returned {status}, retrying in {delay:.2f}s")
+                    time.sleep(delay)
+                else:
+                    breaker.record_success()
+                    return result
+        return wrapper
+    return decorator
+
 class NotificationTools:
     """Tools for sending notifications to various platforms"""
     
+    _instance = None
+    _instance_lock = threading.Lock()
+    
+    @classmethod
+    def instance(cls):
+        """Return the process-wide NotificationTools, creating it on first use"""
+        with cls._instance_lock:
+            if cls._instance is None:
+                cls._instance = cls()
+            return cls._instance
+    
     def __init__(self):
         """Initialize notification tools for various platforms"""
         # Slack setup
@@ -22,8 +189,12 @@ class NotificationTools:
         self.slack_default_channel = os.environ.get("SLACK_DEFAULT_CHANNEL", "#incidents")
         self.slack_client = None
         
+        # Vendor SDKs are imported only for the channels that are configured
         if self.slack_token:
-            self.slack_client = WebClient(token=self.slack_token)
+            from slack_sdk import WebClient
+            from slack_sdk.errors import SlackApiError
+            self._slack_api_error = SlackApiError
+            self.slack_client = _shared_client("slack", self.slack_token, lambda: WebClient(token=self.slack_token))
         else:
             logger.warning("SLACK_BOT_TOKEN not provided. Slack notifications will be disabled.")
             
@@ -34,7 +205,7 @@ class NotificationTools:
         
         if self.pagerduty_token:
             try:
-                self.pagerduty_client = PagerDutyClient(self.pagerduty_token)
+                self.pagerduty_client = _shared_client("pagerduty", self.pagerduty_token, lambda: _build_pagerduty_client(self.pagerduty_token))
             except ValueError as e:
                 logger.warning(f"Failed to initialize PagerDuty client: {str(e)}")
         else:
@@ -50,7 +221,8 @@ class NotificationTools:
         
         if self.webex_token:
             try:
-                self.webex_client = WebexTeamsAPI(access_token=self.webex_token)
+                from webexteamssdk import WebexTeamsAPI
+                self.webex_client = _shared_client("webex", self.webex_token, lambda: WebexTeamsAPI(access_token=self.webex_token))
             except Exception as e:
                 logger.warning(f"Failed to initialize Webex Teams client: {str(e)}")
         else:
@@ -58,18 +230,25 @@ class NotificationTools:
             
         if not self.webex_default_room_id:
             logger.warning("WEBEX_DEFAULT_ROOM_ID not provided. Webex Teams messages will require explicit room ID.")
+            
+        # Queued Slack messages, drained by a background worker started on first use
+        self._slack_queue = queue.Queue()
+        self._slack_worker = None
+        self._slack_worker_lock = threading.Lock()
     
     @tool("Send a notification to Slack")
-    def send_slack_message(self, message: str, channel: Optional[str] = None) -> Dict[str, Any]:
+    def send_slack_message(self, message: str, channel: Optional[str] = None, batch: bool = False) -> Dict[str, Any]:
         """
         Send a message to Slack
         
         Args:
             message (str): The message to send
             channel (str, optional): The channel to send to. Uses default channel if not specified.
+            batch (bool, optional): Queue the message and return immediately. Messages queued for
+                the same channel within SLACK_BATCH_WINDOW seconds are posted together.
             
         Returns:
-            Dict[str, Any]: Response from Slack API
+            Dict[str, Any]: Response from Slack API, or a "queued" status when batching
         """
         if not self.slack_client:
             logger.warning("Slack client not initialized. Cannot send notification.")
@@ -79,29 +258,106 @@ class NotificationTools:
                 "message": message
             }
             
+        channel = channel or self.slack_default_channel
+        
+        if batch:
+            self._ensure_slack_worker()
+            self._slack_queue.put((channel, message))
+            return {"status": "queued", "channel": channel, "message": message}
+            
         try:
-            channel = channel or self.slack_default_channel
-            response = self.slack_client.chat_postMessage(
-                channel=channel,
-                text=message,
-                blocks=self._create_slack_blocks(message)
-            )
+            with NOTIF_HIST.labels(kind="slack").time():
+                response = self._slack_post(
+                    channel=channel,
+                    text=message,
+                    blocks=self._create_slack_blocks(message)
+                )
             return {"status": "success", "response": str(response)}
-        except SlackApiError as e:
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping Slack message: {str(e)}")
+            return {"status": "circuit_open", "error": str(e), "message": message}
+        except self._slack_api_error as e:
+            NOTIF_ERRORS.labels(kind="slack").inc()
             logger.error(f"Error sending Slack message: {str(e)}")
             return {"status": "error", "error": str(e), "message": message}
     
+    def flush_slack_queue(self) -> None:
+        """Block until every queued Slack message has been posted"""
+        self._slack_queue.join()
+    
+    def _ensure_slack_worker(self) -> None:
+        """Start the background worker that drains the Slack queue, if it is not running"""
+        with self._slack_worker_lock:
+            if self._slack_worker is None or not self._slack_worker.is_alive():
+                self._slack_worker = threading.Thread(
+                    target=self._drain_slack_queue,
+                    name="slack-notifier",
+                    daemon=True
+                )
+                self._slack_worker.start()
+    
+    def _drain_slack_queue(self) -> None:
+        """Collect queued messages for one batch window and post them grouped by channel"""
+        while True:
+            items = [self._slack_queue.get()]
+            deadline = time.monotonic() + SLACK_BATCH_WINDOW
+            while True:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    items.append(self._slack_queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+                    
+            # Group by channel while keeping the order messages were queued in
+            by_channel = {}
+            for channel, message in items:
+                by_channel.setdefault(channel, []).append(message)
+                
+            for channel, messages in by_channel.items():
+                messages = _collapse_repeats(messages)
+                for i in range(0, len(messages), SLACK_MAX_BLOCKS):
+                    try:
+                        self._post_slack_batch(channel, messages[i:i + SLACK_MAX_BLOCKS])
+                    except Exception as e:
+                        NOTIF_ERRORS.labels(kind="slack").inc()
+                        logger.error(f"Error sending batched Slack message to {channel}: {str(e)}")
+                    
+            for _ in items:
+                self._slack_queue.task_done()
+    
+    def _post_slack_batch(self, channel: str, messages: list) -> None:
+        """Post several messages to one channel as a single Slack message"""
+        blocks = []
+        for message in messages:
+            blocks.extend(self._create_slack_blocks(message))
+            
+        with NOTIF_HIST.labels(kind="slack").time():
+            self._slack_post(
+                channel=channel,
+                text="\n\n".join(messages),
+                blocks=blocks
+            )
+    
+    @_with_retries("slack")
+    def _slack_post(self, **kwargs):
+        """Call chat.postMessage, retrying transient failures"""
+        return self.slack_client.chat_postMessage(**kwargs)
+    
+    @_with_retries("pagerduty")
+    def _pagerduty_create_incident(self, **kwargs):
+        """Create a PagerDuty incident, retrying transient failures"""
+        return self.pagerduty_client.create_incident(**kwargs)
+    
+    @_with_retries("webex")
+    def _webex_create_message(self, **kwargs):
+        """Post a Webex Teams message, retrying transient failures"""
+        return self.webex_client.messages.create(**kwargs)
+    
     def _create_slack_blocks(self, message: str) -> list:
         """Create Slack message blocks for rich formatting"""
-        return [
-            {
-                "type": "section",
-                "text": {
-                    "type": "mrkdwn",
-                    "text": message
-                }
-            }
-        ]
+        return list(_slack_blocks(message))
 
     @tool("Create an incident in PagerDuty")
     def create_pagerduty_incident(self, title: str, description: str, severity: str = "critical") -> Dict[str, Any]:
@@ -139,12 +395,13 @@ class NotificationTools:
             urgency = "high" if severity == "critical" else "low"
             
             # Create the incident
-            response = self.pagerduty_client.create_incident(
-                title=title,
-                service=self.pagerduty_service_id,
-                description=description,
-                urgency=urgency
-            )
+            with NOTIF_HIST.labels(kind="pagerduty").time():
+                response = self._pagerduty_create_incident(
+                    title=title,
+                    service=self.pagerduty_service_id,
+                    description=description,
+                    urgency=urgency
+                )
             
             # Extract the incident ID and URL from the response for easier reference
             incident_id = response.get("id") if isinstance(response, dict) else None
@@ -156,7 +413,11 @@ class NotificationTools:
                 "incident_url": incident_url,
                 "response": str(response)
             }
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping PagerDuty incident: {str(e)}")
+            return {"status": "circuit_open", "error": str(e), "title": title, "description": description}
         except Exception as e:
+            NOTIF_ERRORS.labels(kind="pagerduty").inc()
             logger.error(f"Error creating PagerDuty incident: {str(e)}")
             return {"status": "error", "error": str(e), "title": title, "description": description}
 
@@ -191,12 +452,17 @@ class NotificationTools:
             }
             
         try:
-            response = self.webex_client.messages.create(
-                roomId=room_id,
-                markdown=message
-            )
+            with NOTIF_HIST.labels(kind="webex").time():
+                response = self._webex_create_message(
+                    roomId=room_id,
+                    markdown=message
+                )
             return {"status": "success", "response": str(response)}
+        except CircuitOpenError as e:
+            logger.warning(f"Skipping Webex Teams message: {str(e)}")
+            return {"status": "circuit_open", "error": str(e), "message": message}
         except Exception as e:
+            NOTIF_ERRORS.labels(kind="webex").inc()
             logger.error(f"Error sending Webex Teams message: {str(e)}")
             return {"status": "error", "error": str(e), "message": message}
 
@@ -221,26 +487,26 @@ class NotificationTools:
         Returns:
             Dict[str, Any]: Combined results from all notification channels
         """
-        results = {}
-        
         # For PagerDuty, we need a title
         if not title and send_pagerduty:
             title = message.split('\n')[0] if '\n' in message else message[:50] + "..."
         
-        # Send to Slack if requested
+        # Each platform is a separate endpoint, so deliver to all of them concurrently
+        futures = {}
         if send_slack:
-            slack_result = self.send_slack_message(message, channel=slack_channel)
-            results["slack"] = slack_result
-        
-        # Send to PagerDuty if requested
+            futures["slack"] = _SEND_POOL.submit(self.send_slack_message, message, channel=slack_channel)
         if send_pagerduty:
-            pd_result = self.create_pagerduty_incident(title, message, severity=severity)
-            results["pagerduty"] = pd_result
-        
-        # Send to Webex Teams if requested
+            futures["pagerduty"] = _SEND_POOL.submit(self.create_pagerduty_incident, title, message, severity=severity)
         if send_webex:
-            webex_result = self.send_webex_message(message, room_id=webex_room_id)
-            results["webex"] = webex_result
+            futures["webex"] = _SEND_POOL.submit(self.send_webex_message, message, room_id=webex_room_id)
+            
+        results = {}
+        for channel, future in futures.items():
+            try:
+                results[channel] = future.result()
+            except Exception as e:
+                logger.error(f"Error sending {channel} notification: {str(e)}")
+                results[channel] = {"status": "error", "error": str(e), "message": message}
         
         # Determine overall status
         success_count = sum(1 for channel, result in results.items() if result.get("status") == "success")
@@ -1,47 +1,434 @@
 """
 Prometheus tools for querying metrics data
 """
-import requests
-import json
+import asyncio
+import orjson
 import os
-from datetime import datetime, timedelta
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
 from urllib.parse import urljoin
+from common.tools.cache import DiskCache, TTLCache
+from common.tools.circuit import CircuitBreaker
+from common.tools.instrumentation import CACHE_HITS
+
+# (connect, read) timeout in seconds for Prometheus requests
+PROMETHEUS_TIMEOUT = (3.05, float(os.environ.get("PROMETHEUS_READ_TIMEOUT", "30")))
+
+
+# Set PROMETHEUS_CACHE_ENABLED=false to send every read to Prometheus
+PROMETHEUS_CACHE_ENABLED = os.environ.get("PROMETHEUS_CACHE_ENABLED", "true").lower() not in ("0", "false", "no")
+
+# Metric-name and target listings change slowly but can be large, so successful
+# responses are reused for a short while instead of being refetched and decoded
+PROM_LISTING_TTL = int(os.environ.get("PROM_LISTING_TTL", "30"))
+_LISTING_CACHE = TTLCache(maxsize=32, ttl=PROM_LISTING_TTL)
+
+# The same PromQL is often issued several times within one reasoning step. Range
+# matrices can be large, so the cache is also bounded by the samples it holds in total
+PROM_QUERY_TTL = int(os.environ.get("PROM_QUERY_TTL", "15"))
+PROM_QUERY_CACHE_SAMPLES = int(os.environ.get("PROM_QUERY_CACHE_SAMPLES", "250000"))
+
+
+def _sample_count(result):
+    """Number of samples in a query result, as its cache weight"""
+    series = result.get("data", {}).get("result", ())
+    if not isinstance(series, list):
+        return 1
+    return sum(len(item.get("values", ())) or 1 for item in series) or 1
+
+
+_QUERY_CACHE = TTLCache(
+    maxsize=1024, ttl=PROM_QUERY_TTL, maxweight=PROM_QUERY_CACHE_SAMPLES, weigher=_sample_count
+)
+
+# Metric metadata (type, help, unit) practically never changes at runtime
+PROM_METADATA_TTL = int(os.environ.get("PROM_METADATA_TTL", "3600"))
+_METADATA_CACHE = TTLCache(maxsize=64, ttl=PROM_METADATA_TTL)
+
+# Metric names and metadata are also kept on disk, so a restarted agent plans its
+# first steps without refetching them. Target listings are live health, so they are not.
+PROM_DISK_CACHE_DIR = os.environ.get("PROM_DISK_CACHE_DIR") or os.path.join(
+    os.environ.get("XDG_CACHE_HOME") or os.path.expanduser("~/.cache"), "observability-agent", "prom"
+)
+_METRICS_DISK_CACHE = DiskCache(PROM_DISK_CACHE_DIR, ttl=int(os.environ.get("PROM_METRICS_DISK_TTL", "3600")))
+_METADATA_DISK_CACHE = DiskCache(PROM_DISK_CACHE_DIR, ttl=int(os.environ.get("PROM_METADATA_DISK_TTL", "86400")))
+
+# Consecutive transient failures (timeouts, connection errors, 429/5xx) after which
+# calls to a Prometheus fail fast, and for how long, so a hung server cannot pin
+# every agent thread for a full read timeout
+PROM_CIRCUIT_FAILURES = int(os.environ.get("PROM_CIRCUIT_FAILURES", "5"))
+PROM_CIRCUIT_COOLDOWN = float(os.environ.get("PROM_CIRCUIT_COOLDOWN", "30"))
+
+# One breaker per Prometheus API base URL, shared by every tool pointed at it
+_BREAKERS = {}
+
+# Shared pool for issuing independent queries concurrently; stays below the session's pool size
+PROM_FANOUT_WORKERS = int(os.environ.get("PROM_FANOUT_WORKERS", "16"))
+_FANOUT_POOL = ThreadPoolExecutor(max_workers=PROM_FANOUT_WORKERS, thread_name_prefix="prom-fanout")
+
+# PromQL templates for the per-service helpers
+_UP_TMPL = 'up{{service="{service}"}}'
+_DEPENDENCIES_TMPL = 'count by (destination_service) (service_calls{{source_service="{service}"}})'
+_CALLERS_TMPL = 'count by (source_service) (service_calls{{destination_service="{service}"}})'
+
+# Both call directions in one round trip, each series tagged with a direction label
+_BOTH_DIRECTIONS_TMPL = (
+    'label_replace(' + _DEPENDENCIES_TMPL + ', "direction", "downstream", "", "") or '
+    'label_replace(' + _CALLERS_TMPL + ', "direction", "upstream", "", "")'
+)
+
+# Label values interpolated into PromQL; anything else could break out of the
+# quoted matcher and inject arbitrary selectors
+_LABEL_VALUE_RE = re.compile(r"^[A-Za-z0-9_.-]+$")
+
+
+def _invalid_labels(**labels):
+    """
+    Check label values before they are interpolated into PromQL
+
+    Args:
+        **labels: Label name to value; None values are skipped
+
+    Returns:
+        dict: An error response naming the first invalid label, or None if all are valid
+    """
+    for name, value in labels.items():
+        if value is not None and not _LABEL_VALUE_RE.match(str(value)):
+            return {"status": "error", "error": f"Invalid {name}: {value!r}"}
+    return None
+
+
+# PromQL for each resource type supported by get_resource_usage
+_RESOURCE_QUERIES = {
+    "cpu": 'sum(rate(container_cpu_usage_seconds_total{{service="{service}"}}[5m]))',
+    "memory": 'sum(container_memory_usage_bytes{{service="{service}"}}) / 1024 / 1024'
+}
+
+
+@lru_cache(maxsize=4096)
+def _render(template, service):
+    """Render a per-service PromQL template; validated services repeat, so memoize them"""
+    return template.format(service=service)
+
+
+# Durations such as "15s", "5m" or "1h"
+_DURATION_RE = re.compile(r"^(\d+)([smhdw])$")
+_UNIT_SECONDS = {"s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+# Prometheus refuses range queries that would return more points than this per series
+MAX_POINTS_PER_QUERY = 11000
+
+
+def _cache_key(endpoint, params=None):
+    """Hashable key for a GET against endpoint with the given query parameters"""
+    return (endpoint, tuple(sorted((params or {}).items())))
+
+
+def _cache_get(cache, key, name):
+    """
+    Return a cached response, or None when missing, expired or caching is disabled
+
+    Args:
+        cache (TTLCache or DiskCache): Cache to look in
+        key (tuple): Cache key
+        name (str): Value of the cache label on the hit counter
+
+    Returns:
+        dict: The cached response, or None
+    """
+    if not PROMETHEUS_CACHE_ENABLED:
+        return None
+    cached = cache.get(key)
+    if cached is not None:
+        CACHE_HITS.labels(cache=name).inc()
+    return cached
+
+
+def _cache_put(cache, key, value, **kwargs):
+    """Store a successful response unless caching is disabled; kwargs go to cache.set"""
+    if PROMETHEUS_CACHE_ENABLED:
+        cache.set(key, value, **kwargs)
+
+
+def _duration_seconds(value):
+    """Convert a duration string like "15s" or "5m" to seconds, or None if it cannot be parsed"""
+    match = _DURATION_RE.match(value) if isinstance(value, str) else None
+    if not match:
+        return None
+    return int(match.group(1)) * _UNIT_SECONDS[match.group(2)]
+
+
+def _align(ts, step_seconds):
+    """
+    Snap a Unix timestamp down to a multiple of step_seconds, so range queries issued
+    moments apart share cache keys. Non-numeric timestamps are returned unchanged.
+    """
+    try:
+        return int(float(ts)) // step_seconds * step_seconds
+    except (TypeError, ValueError):
+        return ts
+
+
+def _parse(response):
+    """Decode a Prometheus JSON body with orjson, which is several times faster on large results"""
+    return orjson.loads(response.content)
+
+
+def _scalar(result, default=0.0):
+    """Value of the first sample in an instant query result as a float, or default"""
+    try:
+        return float(result["data"]["result"][0]["value"][1])
+    except (KeyError, IndexError, TypeError, ValueError):
+        return default
+
+
+def _vector(result):
+    """Yield (labels, value) pairs from an instant query result vector"""
+    for series in result.get("data", {}).get("result", ()):
+        try:
+            value = float(series["value"][1])
+        except (KeyError, IndexError, TypeError, ValueError):
+            value = 0.0
+        yield series.get("metric", {}), value
+
+
+def _error_response(message, response):
+    """
+    Build the error result for a failed Prometheus request
+
+    Args:
+        message (str): What failed, e.g. "Query failed"
+        response (requests.Response): The failed response
+
+    Returns:
+        dict: Error result, flagged retryable for rate limiting and server errors so
+        callers can retry those and give up immediately on bad queries
+    """
+    status_code = response.status_code
+    return {
+        "status": "error",
+        "error": f"{message} with status {status_code}: {response.text}",
+        "status_code": status_code,
+        "retryable": status_code == 429 or 500 <= status_code < 600
+    }
+
+
+class PrometheusQueryError(Exception):
+    """Raised by streaming helpers, which cannot return an error dict mid-stream"""
+    
+    def __init__(self, response):
+        super().__init__(response.get("error", "Unknown error"))
+        self.response = response
+
+
+def _build_session(pool_maxsize=32, pool_block=False):
+    """
+    Create a keep-alive session with a connection pool and retries for transient errors
+    
+    Args:
+        pool_maxsize (int, optional): Maximum number of connections kept open per host
+        pool_block (bool, optional): Wait for a free pooled connection instead of opening
+            a throwaway one when all of them are busy
+            
+    Returns:
+        requests.Session: The configured session
+    """
+    # requests and urllib3 are imported on first use so that importing the tools
+    # (e.g. by an agent that never queries Prometheus) does not pay for them
+    import requests
+    from requests.adapters import HTTPAdapter
+    from urllib3.util.request import ACCEPT_ENCODING
+    from urllib3.util.retry import Retry
+    
+    session = requests.Session()
+    adapter = HTTPAdapter(
+        pool_connections=16,
+        pool_maxsize=pool_maxsize,
+        pool_block=pool_block,
+        max_retries=Retry(
+            total=2,
+            backoff_factor=0.2,
+            status_forcelist=(429, 502, 503, 504),
+            allowed_methods=("GET",),
+            raise_on_status=False
+        )
+    )
+    session.mount("http://", adapter)
+    session.mount("https://", adapter)
+    # Ask for compressed bodies explicitly; large query results shrink several-fold.
+    # ACCEPT_ENCODING lists every codec urllib3 can decode here, so brotli (br) is
+    # negotiated whenever the optional brotli package is installed
+    session.headers.update({"Connection": "keep-alive", "Accept-Encoding": ACCEPT_ENCODING})
+    return session
+
+
+# Process-wide sessions, one per pool configuration, shared by every tool that is not
+# given its own so tools created per agent turn keep reusing the same keep-alive
+# connections. Built on first use rather than at import.
+_SESSIONS = {}
+_SESSIONS_LOCK = threading.Lock()
+
+
+def _shared_session(pool_maxsize=32, pool_block=False):
+    """
+    Return the process-wide session for a pool configuration, creating it on first use
+    
+    Args:
+        pool_maxsize (int, optional): Maximum number of connections kept open per host
+        pool_block (bool, optional): Wait for a free pooled connection when all are busy
+        
+    Returns:
+        requests.Session: The shared session
+    """
+    key = (pool_maxsize, pool_block)
+    session = _SESSIONS.get(key)
+    if session is None:
+        with _SESSIONS_LOCK:
+            session = _SESSIONS.get(key)
+            if session is None:
+                session = _SESSIONS[key] = _build_session(pool_maxsize, pool_block)
+    return session
+
+
+def close_shared_sessions():
+    """
+    Drop the idle pooled connections of every process-wide session, e.g. at shutdown.
+    The sessions remain usable and reconnect on the next request.
+    """
+    with _SESSIONS_LOCK:
+        for session in _SESSIONS.values():
+            session.close()
+
 
 class PrometheusTools:
     """Collection of tools for working with Prometheus metrics"""
     
-    def __init__(self, prometheus_url=None):
+    def __init__(self, prometheus_url=None, session=None):
         self.prometheus_url = prometheus_url or os.environ.get('PROMETHEUS_URL', "http://prometheus:9090")
         self.api_path = "/api/v1/"
+        # Resolved once; endpoint URLs are then plain concatenation on the hot path
+        self._api_base = urljoin(self.prometheus_url, self.api_path)
+        self._breaker = _BREAKERS.setdefault(
+            self._api_base, CircuitBreaker(PROM_CIRCUIT_FAILURES, PROM_CIRCUIT_COOLDOWN)
+        )
+        # Reuse one pooled session so consecutive queries share keep-alive connections
+        self.session = session or _shared_session()
     
-    def query(self, query, time=None):
+    def _get(self, path, params=None, cache=None, error_message="Request failed", shape=None, headers=None,
+             disk_cache=None):
+        """
+        Issue a GET against the Prometheus HTTP API; every public method goes through here
+        
+        Args:
+            path (str): API path below /api/v1/
+            params (dict, optional): Query parameters
+            cache (TTLCache, optional): Cache to reuse and keep successful responses in
+            error_message (str, optional): Prefix for the error response on failure
+            shape (callable, optional): Turns the decoded body into the returned response
+            headers (dict, optional): Extra request headers
+            disk_cache (DiskCache, optional): Persistent cache consulted after cache misses
+            
+        Returns:
+            dict: The decoded (and shaped) response, or an error response
+        """
+        endpoint = self._api_base + path
+        cache_key = _cache_key(endpoint, params)
+        if cache is not None:
+            cached = _cache_get(cache, cache_key, "memory")
+            if cached is not None:
+                return cached
+        if disk_cache is not None:
+            cached = _cache_get(disk_cache, cache_key, "disk")
+            if cached is not None:
+                if cache is not None:
+                    _cache_put(cache, cache_key, cached)
+                return cached
+                
+        if not self._breaker.allow():
+            return {
+                "status": "error",
+                "error": f"{error_message}: Prometheus circuit open after repeated failures",
+                "retryable": True
+            }
+            
+        try:
+            response = self.session.get(endpoint, params=params, headers=headers, timeout=PROMETHEUS_TIMEOUT)
+        except OSError as e:
+            # requests' ConnectionError and Timeout are OSError subclasses
+            self._breaker.record_failure()
+            return {"status": "error", "error": f"{error_message}: {e}", "retryable": True}
+            
+        if response.status_code != 200:
+            error = _error_response(error_message, response)
+            if error["retryable"]:
+                self._breaker.record_failure()
+            else:
+                self._breaker.record_success()
+            return error
+            
+        self._breaker.record_success()
+        result = _parse(response)
+        if shape is not None:
+            result = shape(result)
+        if cache is not None:
+            _cache_put(cache, cache_key, result)
+        if disk_cache is not None:
+            _cache_put(disk_cache, cache_key, result)
+        return result
+    
+    def query(self, query, time=None, cache=True):
         """
         Execute a PromQL instant query
         
         Args:
             query (str): The PromQL query to execute
             time (str, optional): RFC3339 or Unix timestamp for query evaluation time
+            cache (bool, optional): Reuse and keep the response in the query cache
             
         Returns:
             dict: Query results
         """
-        endpoint = urljoin(self.prometheus_url, f"{self.api_path}query")
         params = {"query": query}
         
         if time:
             params["time"] = time
             
-        response = requests.get(endpoint, params=params)
+        return self._get("query", params, cache=_QUERY_CACHE if cache else None, error_message="Query failed")
+    
+    def query_many(self, queries, time=None):
+        """
+        Execute several PromQL instant queries concurrently
         
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {
-                "status": "error",
-                "error": f"Query failed with status {response.status_code}: {response.text}"
-            }
+        Args:
+            queries (dict): Mapping of name to PromQL query
+            time (str, optional): RFC3339 or Unix timestamp for query evaluation time
+            
+        Returns:
+            dict: Mapping of name to query results
+        """
+        futures = {
+            name: _FANOUT_POOL.submit(self.query, query, time)
+            for name, query in queries.items()
+        }
+        return {name: future.result() for name, future in futures.items()}
+    
+    def bulk_query(self, queries, time=None):
+        """
+        Execute a list of PromQL instant queries concurrently
+        
+        Args:
+            queries (list): PromQL queries to execute
+            time (str, optional): RFC3339 or Unix timestamp for query evaluation time
+            
+        Returns:
+            list: Query results in the same order as queries
+        """
+        results = self.query_many(dict(enumerate(queries)), time)
+        return [results[i] for i in range(len(queries))]
     
-    def range_query(self, query, start, end, step):
+    def range_query(self, query, start, end, step, align=True, cache=True):
         """
         Execute a PromQL range query
         
@@ -50,11 +437,21 @@ class PrometheusTools:
             start (str): Start timestamp (RFC3339 or Unix timestamp)
             end (str): End timestamp (RFC3339 or Unix timestamp)
             step (str): Query resolution step width (e.g. "30s", "5m")
+            align (bool, optional): Snap Unix start/end down to a multiple of step
+            cache (bool, optional): Reuse and keep the response in the query cache
             
         Returns:
             dict: Range query results
         """
-        endpoint = urljoin(self.prometheus_url, f"{self.api_path}query_range")
+        headers = None
+        step_seconds = _duration_seconds(step)
+        if step_seconds:
+            if align:
+                start = _align(start, step_seconds)
+                end = _align(end, step_seconds)
+            # Aligned windows stay valid for a full step, so let intermediate caches keep them
+            headers = {"Cache-Control": f"max-age={step_seconds}"}
+            
         params = {
             "query": query,
             "start": start,
@@ -62,15 +459,75 @@ class PrometheusTools:
             "step": step
         }
             
-        response = requests.get(endpoint, params=params)
+        return self._get(
+            "query_range", params,
+            cache=_QUERY_CACHE if cache else None,
+            error_message="Range query failed",
+            headers=headers
+        )
+    
+    def iter_range_query(self, query, start, end, step, max_points=MAX_POINTS_PER_QUERY):
+        """
+        Execute a long PromQL range query as consecutive windows, yielding each one
         
-        if response.status_code == 200:
-            return response.json()
-        else:
-            return {
-                "status": "error",
-                "error": f"Range query failed with status {response.status_code}: {response.text}"
-            }
+        Only one window's response is held at a time, so callers can walk hours of
+        high-cardinality data without materializing the whole matrix. Windows are also
+        kept under Prometheus' per-query point limit.
+        
+        Args:
+            query (str): The PromQL query to execute
+            start (float): Start Unix timestamp
+            end (float): End Unix timestamp
+            step (str): Query resolution step width (e.g. "30s", "5m")
+            max_points (int, optional): Maximum samples per series in each window
+            
+        Yields:
+            dict: Range query results for each window, stopping after the first error
+        """
+        step_seconds = _duration_seconds(step)
+        if not step_seconds or not isinstance(start, (int, float)) or not isinstance(end, (int, float)):
+            # Without numeric bounds the window cannot be split
+            yield self.range_query(query, start, end, step, cache=False)
+            return
+            
+        window = step_seconds * max_points
+        window_start = _align(start, step_seconds)
+        end = _align(end, step_seconds)
+        while window_start <= end:
+            # Consecutive windows start one step apart so no sample is returned twice
+            window_end = min(window_start + window - step_seconds, end)
+            # Windows bypass the query cache, which would otherwise pin them in memory
+            result = self.range_query(query, window_start, window_end, step, align=False, cache=False)
+            yield result
+            if result.get("status") != "success":
+                return
+            window_start = window_end + step_seconds
+    
+    def stream_range_query(self, query, start, end, step, max_points=MAX_POINTS_PER_QUERY):
+        """
+        Execute a long PromQL range query, yielding one series chunk at a time
+        
+        Built on iter_range_query, so at most one window's response is decoded at once.
+        A series spanning several windows is yielded once per window, in time order.
+        
+        Args:
+            query (str): The PromQL query to execute
+            start (float): Start Unix timestamp
+            end (float): End Unix timestamp
+            step (str): Query resolution step width (e.g. "30s", "5m")
+            max_points (int, optional): Maximum samples per series in each window
+            
+        Yields:
+            tuple: (labels, values) for each series in each window
+            
+        Raises:
+            PrometheusQueryError: If a window fails; carries the error response
+        """
+        for result in self.iter_range_query(query, start, end, step, max_points):
+            if result.get("status") != "success":
+                raise PrometheusQueryError(result)
+            for series in result.get("data", {}).get("result", ()):
+                yield series.get("metric", {}), series.get("values", [])
     
     def get_service_health(self, service):
         """
@@ -82,16 +539,21 @@ class PrometheusTools:
         Returns:
             dict: Service health metrics
         """
-        query = f'up{{service="{service}"}}'
-        result = self.query(query)
-        
+        invalid = _invalid_labels(service=service)
+        if invalid:
+            return invalid
+            
+        result = self.query(_render(_UP_TMPL, service))
+        return self._health_response(result)
+    
+    def _health_response(self, result):
+        """Reduce an up query result to a healthy/unhealthy verdict"""
         response = {
             "status": result.get("status", "error")
         }
         
         if result.get("status") == "success":
-            data = result.get("data", {}).get("result", [])
-            if data and float(data[0].get("value", [0, "0"])[1]) > 0:
+            if _scalar(result) > 0:
                 response["health"] = "healthy"
             else:
                 response["health"] = "unhealthy"
@@ -106,68 +568,182 @@ class PrometheusTools:
         
         Args:
             service (str): Service name
-            resource (str): Resource type (cpu, memory)
+            resource (str): Resource type (cpu, memory), or "all" to fetch every type at once
             
         Returns:
-            dict: Resource usage metrics
+            dict: Resource usage metrics, keyed by resource type when resource is "all"
         """
-        if resource == "cpu":
-            query = f'sum(rate(container_cpu_usage_seconds_total{{service="{service}"}}[5m]))'
-        elif resource == "memory":
-            query = f'sum(container_memory_usage_bytes{{service="{service}"}}) / 1024 / 1024'
-        else:
+        invalid = _invalid_labels(service=service)
+        if invalid:
+            return invalid
+            
+        if resource == "all":
+            results = self.query_many({
+                name: _render(query, service)
+                for name, query in _RESOURCE_QUERIES.items()
+            })
+            return {
+                "status": "success",
+                "usage": {name: self._usage_response(result) for name, result in results.items()}
+            }
+            
+        if resource not in _RESOURCE_QUERIES:
             return {"status": "error", "error": f"Unsupported resource type: {resource}"}
             
-        result = self.query(query)
-        
+        result = self.query(_render(_RESOURCE_QUERIES[resource], service))
+        return self._usage_response(result)
+    
+    def _usage_response(self, result):
+        """Reduce a resource usage query result to a single usage value"""
         response = {
             "status": result.get("status", "error")
         }
         
         if result.get("status") == "success":
-            data = result.get("data", {}).get("result", [])
-            if data:
-                response["usage"] = float(data[0].get("value", [0, "0"])[1])
-            else:
-                response["usage"] = 0
+            response["usage"] = _scalar(result, default=0)
         else:
             response["error"] = result.get("error", "Unknown error")
             
         return response
     
-    def get_service_dependencies(self, service):
+    def get_service_dependencies(self, service, include_callers=False):
         """
         Get service dependency metrics
         
         Args:
             service (str): Service name
+            include_callers (bool, optional): Also return the services calling this one,
+                fetched in the same query
             
         Returns:
             dict: Service dependency metrics
         """
-        query = f'count by (destination_service) (service_calls{{source_service="{service}"}})'
-        result = self.query(query)
-        
+        invalid = _invalid_labels(service=service)
+        if invalid:
+            return invalid
+            
+        template = _BOTH_DIRECTIONS_TMPL if include_callers else _DEPENDENCIES_TMPL
+        result = self.query(_render(template, service))
+        return self._dependencies_response(result, include_callers)
+    
+    def _dependencies_response(self, result, include_callers=False):
+        """Split a dependency query result into called and, optionally, calling services"""
         response = {
             "status": result.get("status", "error")
         }
         
         if result.get("status") == "success":
-            data = result.get("data", {}).get("result", [])
             dependencies = []
-            
-            for item in data:
-                dependencies.append({
-                    "service": item.get("metric", {}).get("destination_service", "unknown"),
-                    "calls": float(item.get("value", [0, "0"])[1])
-                })
-                
+            callers = []
+            for labels, value in _vector(result):
+                if labels.get("direction") == "upstream":
+                    callers.append({
+                        "service": labels.get("source_service", "unknown"),
+                        "calls": value
+                    })
+                else:
+                    dependencies.append({
+                        "service": labels.get("destination_service", "unknown"),
+                        "calls": value
+                    })
+                    
             response["dependencies"] = dependencies
+            if include_callers:
+                response["callers"] = callers
         else:
             response["error"] = result.get("error", "Unknown error")
             
         return response
     
+    def get_services_overview(self, services):
+        """
+        Get health and resource usage for several services in one concurrent round
+        
+        Args:
+            services (list): Service names
+            
+        Returns:
+            dict: Health and CPU/memory usage keyed by service name
+        """
+        queries = {}
+        for service in services:
+            invalid = _invalid_labels(service=service)
+            if invalid:
+                return invalid
+            queries[(service, "health")] = _render(_UP_TMPL, service)
+            for name, query in _RESOURCE_QUERIES.items():
+                queries[(service, name)] = _render(query, service)
+                
+        results = self.query_many(queries)
+        overview = {}
+        for service in services:
+            overview[service] = {"health": self._health_response(results[(service, "health")])}
+            for name in _RESOURCE_QUERIES:
+                overview[service][name] = self._usage_response(results[(service, name)])
+                
+        return {
+            "status": "success",
+            "services": overview
+        }
+    
+    def snapshot(self, service):
+        """
+        Get health, resource usage and dependencies of a service in one concurrent round
+        
+        Args:
+            service (str): Service name
+            
+        Returns:
+            dict: Health, CPU, memory and dependency results for the service
+        """
+        invalid = _invalid_labels(service=service)
+        if invalid:
+            return invalid
+            
+        results = self.query_many(self._snapshot_queries(service))
+        return self._snapshot_response(service, results)
+    
+    async def asnapshot(self, service):
+        """
+        Awaitable snapshot() for callers already running an event loop
+        
+        Args:
+            service (str): Service name
+            
+        Returns:
+            dict: Health, CPU, memory and dependency results for the service
+        """
+        invalid = _invalid_labels(service=service)
+        if invalid:
+            return invalid
+            
+        loop = asyncio.get_running_loop()
+        queries = self._snapshot_queries(service)
+        responses = await asyncio.gather(
+            *(loop.run_in_executor(_FANOUT_POOL, self.query, query) for query in queries.values())
+        )
+        return self._snapshot_response(service, dict(zip(queries, responses)))
+    
+    def _snapshot_queries(self, service):
+        """PromQL for each probe in a service snapshot"""
+        return {
+            "health": _render(_UP_TMPL, service),
+            "cpu": _render(_RESOURCE_QUERIES["cpu"], service),
+            "memory": _render(_RESOURCE_QUERIES["memory"], service),
+            "dependencies": _render(_DEPENDENCIES_TMPL, service)
+        }
+    
+    def _snapshot_response(self, service, results):
+        """Shape the raw snapshot probe results like the individual helpers would"""
+        return {
+            "status": "success",
+            "service": service,
+            "health": self._health_response(results["health"]),
+            "cpu": self._usage_response(results["cpu"]),
+            "memory": self._usage_response(results["memory"]),
+            "dependencies": self._dependencies_response(results["dependencies"])
+        }
+    
     def list_metrics(self):
         """
         List all metric names available in Prometheus
@@ -175,21 +751,13 @@ class PrometheusTools:
         Returns:
             dict: List of metric names
         """
-        endpoint = urljoin(self.prometheus_url, f"{self.api_path}label/__name__/values")
-            
-        response = requests.get(endpoint)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "status": "success",
-                "metrics": data.get("data", [])
-            }
-        else:
-            return {
-                "status": "error",
-                "error": f"Failed to list metrics with status {response.status_code}: {response.text}"
-            }
+        return self._get(
+            "label/__name__/values",
+            cache=_LISTING_CACHE,
+            disk_cache=_METRICS_DISK_CACHE,
+            error_message="Failed to list metrics",
+            shape=lambda data: {"status": "success", "metrics": data.get("data", [])}
+        )
     
     def get_metric_metadata(self, metric):
         """
@@ -201,25 +769,18 @@ class PrometheusTools:
         Returns:
             dict: Metric metadata
         """
-        endpoint = urljoin(self.prometheus_url, f"{self.api_path}metadata")
         params = {}
         
         if metric:
             params["metric"] = metric
             
-        response = requests.get(endpoint, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "status": "success",
-                "metadata": data.get("data", {})
-            }
-        else:
-            return {
-                "status": "error",
-                "error": f"Failed to get metadata with status {response.status_code}: {response.text}"
-            }
+        return self._get(
+            "metadata", params,
+            cache=_METADATA_CACHE,
+            disk_cache=_METADATA_DISK_CACHE,
+            error_message="Failed to get metadata",
+            shape=lambda data: {"status": "success", "metadata": data.get("data", {})}
+        )
     
     def list_targets(self, state=None):
         """
@@ -231,25 +792,17 @@ class PrometheusTools:
         Returns:
             dict: Information about targets
         """
-        endpoint = urljoin(self.prometheus_url, f"{self.api_path}targets")
         params = {}
         
         if state and state != "any":
             params["state"] = state
             
-        response = requests.get(endpoint, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            return {
-                "status": "success",
-                "targets": data.get("data", {})
-            }
-        else:
-            return {
-                "status": "error",
-                "error": f"Failed to get targets with status {response.status_code}: {response.text}"
-            }
+        return self._get(
+            "targets", params,
+            cache=_LISTING_CACHE,
+            error_message="Failed to get targets",
+            shape=lambda data: {"status": "success", "targets": data.get("data", {})}
+        )
     
     def get_target_health(self, job):
         """
@@ -261,16 +814,18 @@ class PrometheusTools:
         Returns:
             dict: Target health information
         """
-        targets_result = self.list_targets()
+        # Dropped targets are never part of a job's health, so leave them on the server
+        targets_result = self.list_targets(state="active")
         
         if targets_result.get("status") != "success":
             return targets_result
         
-        active_targets = targets_result.get("targets", {}).get("activeTargets", [])
-        job_targets = [t for t in active_targets if t.get("labels", {}).get("job") == job]
-        
-        healthy = sum(1 for t in job_targets if t.get("health") == "up")
-        total = len(job_targets)
+        healthy = total = 0
+        for target in targets_result.get("targets", {}).get("activeTargets", []):
+            if target.get("labels", {}).get("job") == job:
+                total += 1
+                if target.get("health") == "up":
+                    healthy += 1
         
         return {
             "status": "success",
@@ -6,13 +6,39 @@ as well as analyzing dependencies between services to help identify the root cau
 """
 
 import logging
+from collections import defaultdict, deque
+import numpy as np
 from typing import Dict, List, Any, Optional
 from crewai.tools import tool
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+
+def _correlated_pairs(counts, threshold):
+    """
+    Yield (i, j, score) for every pair i != j whose score counts[i] / (counts[i] + counts[j])
+    reaches threshold.
+    
+    The score only grows as counts[j] shrinks, so each component's partners are a prefix
+    of the components sorted by count. Binary-searching that prefix visits only the
+    qualifying pairs instead of materializing an N x N score matrix.
+    """
+    order = np.argsort(counts, kind="stable")
+    sorted_counts = counts[order]
+    if threshold <= 0:
+        limits = np.full(len(counts), np.inf)
+    else:
+        limits = counts * (1 - threshold) / threshold
+    # Widen the bound slightly against rounding; the exact score check below decides
+    ends = np.searchsorted(sorted_counts, limits * (1 + 1e-9), side="right")
+    for i in np.nonzero(ends)[0].tolist():
+        partners = np.sort(order[:ends[i]])
+        scores = counts[i] / (counts[i] + counts[partners])
+        keep = (scores >= threshold) & (partners != i)
+        for j, score in zip(partners[keep].tolist(), scores[keep].tolist()):
+            yield i, j, score
+
+
 # Tool functions using crewAI's modern tool pattern with decorators
 @tool("Analyze correlations between different system components and events")
 def correlation_analysis(events: List[Dict[str, Any]], 
@@ -30,31 +56,26 @@ def correlation_analysis(events: List[Dict[str, Any]],
     Returns:
         dict: Correlation analysis results showing relationships between components
     """
-    logger.info(f"Performing correlation analysis on {len(events)} events with threshold {correlation_threshold}")
+    logger.info("Performing correlation analysis on %d events with threshold %s", len(events), correlation_threshold)
     
     # This would typically involve complex correlation algorithms
     # For now, this is a placeholder implementation
     correlations = {}
     
     try:
-        # Group events by component/service
-        components = {}
+        # Count events per component/service; the scoring only needs the counts
+        components = defaultdict(int)
         for event in events:
-            component = event.get("component", "unknown")
-            if component not in components:
-                components[component] = []
-            components[component].append(event)
+            components[event.get("component", "unknown")] += 1
         
         # Find temporal correlations between component events
-        for comp1 in components:
-            correlations[comp1] = {}
-            for comp2 in components:
-                if comp1 != comp2:
-                    # Calculate temporal correlation (simplified)
-                    # In a real implementation, this would use time series analysis
-                    correlation_score = len(components[comp1]) / (len(components[comp1]) + len(components[comp2]))
-                    if correlation_score >= correlation_threshold:
-                        correlations[comp1][comp2] = correlation_score
+        # Calculate temporal correlation (simplified) for every pair at once:
+        # score[i, j] = n_i / (n_i + n_j). In a real implementation, this would use time series analysis
+        comp_names = list(components)
+        correlations = {comp: {} for comp in comp_names}
+        counts = np.fromiter(components.values(), dtype=np.float64, count=len(comp_names))
+        for i, j, score in _correlated_pairs(counts, correlation_threshold):
+            correlations[comp_names[i]][comp_names[j]] = score
         
         return {
             "correlations": correlations,
@@ -64,7 +85,7 @@ def correlation_analysis(events: List[Dict[str, Any]],
         }
         
     except Exception as e:
-        logger.error(f"Error during correlation analysis: {str(e)}")
+        logger.error("Error during correlation analysis: %s", e)
         return {
             "error": str(e),
             "correlations": {},
@@ -89,7 +110,7 @@ def dependency_analysis(services: List[str],
     Returns:
         dict: Dependency analysis results showing service relationships
     """
-    logger.info(f"Analyzing dependencies for {len(services)} services")
+    logger.info("Analyzing dependencies for %d services", len(services))
     
     # Use provided dependency data or create sample data for demonstration
     dependencies = dependency_data or {}
@@ -104,38 +125,46 @@ def dependency_analysis(services: List[str],
                     f"dependent-service-{i}" for i in range(1, 3)
                 ]
         
+        # Index services that depend on each service once, instead of rescanning per service
+        dependents = defaultdict(list)
+        for s, deps in dependencies.items():
+            for dep in set(deps):
+                if dep != s:
+                    dependents[dep].append(s)
+        
         # Calculate impact graph
         impact_graph = {}
         for service in services:
             if service in dependencies:
                 impact_graph[service] = {
                     "direct_dependencies": dependencies[service],
-                    "dependents": []
+                    "dependents": dependents.get(service, [])
                 }
-                
-                # Find services that depend on this service
-                for s, deps in dependencies.items():
-                    if service in deps and s != service:
-                        impact_graph[service]["dependents"].append(s)
         
         # Calculate transitive dependencies if requested
         if include_transitive:
+            # Everything reachable from each analyzed service; a walk that reaches a
+            # service whose closure is already known reuses it instead of re-walking it
+            closure = {}
             for service in services:
                 if service in impact_graph:
                     transitive_deps = set()
-                    queue = list(impact_graph[service]["direct_dependencies"])
+                    queue = deque(impact_graph[service]["direct_dependencies"])
                     visited = set(queue)
                     
                     while queue:
-                        dep = queue.pop(0)
+                        dep = queue.popleft()
                         transitive_deps.add(dep)
-                        if dep in dependencies:
-                            for next_dep in dependencies[dep]:
-                                if next_dep not in visited:
-                                    visited.add(next_dep)
-                                    queue.append(next_dep)
+                        if dep in closure:
+                            transitive_deps |= closure[dep]
+                            continue
+                        for next_dep in dependencies.get(dep, ()):
+                            if next_dep not in visited:
+                                visited.add(next_dep)
+                                queue.append(next_dep)
                     
-                    impact_graph[service]["transitive_dependencies"] = list(transitive_deps)
+                    closure[service] = transitive_deps
+                    impact_graph[service]["transitive_dependencies"] = sorted(transitive_deps)
         
         return {
             "impact_graph": impact_graph,
@@ -144,7 +173,7 @@ def dependency_analysis(services: List[str],
         }
         
     except Exception as e:
-        logger.error(f"Error during dependency analysis: {str(e)}")
+        logger.error("Error during dependency analysis: %s", e)
         return {
             "error": str(e),
             "impact_graph": {},
@@ -1,19 +1,346 @@
+import asyncio
+import html
 import os
 import re
 import logging
+import importlib.util
 import requests
+from requests.adapters import HTTPAdapter
 from bs4 import BeautifulSoup
 import markdown
 import base64
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
+from functools import lru_cache
 from urllib.parse import urlparse
 from crewai.tools import tool
+from common.tools.cache import TTLCache
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Keep-alive session shared by the HTTP runbook sources, so probing several candidate
+# paths on api.github.com or the HTML site reuses one TLS connection
+_SESSION = requests.Session()
+_SESSION.mount("https://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+_SESSION.mount("http://", HTTPAdapter(pool_connections=10, pool_maxsize=20))
+
+# Pool for probing candidate runbook locations concurrently
+_PROBE_POOL = ThreadPoolExecutor(max_workers=8, thread_name_prefix="runbook-probe")
+
+# Pool for querying the runbook sources concurrently. Kept apart from the probe pool,
+# since each source blocks on its own probes
+_SOURCE_POOL = ThreadPoolExecutor(max_workers=6, thread_name_prefix="runbook-source")
+
+
+def _first_found(probe, candidates, pool=_PROBE_POOL):
+    """
+    Probe candidates concurrently and return the result of the earliest one, in
+    priority order, that yields a result. Wall time is that of the slowest probe
+    up to the winner, rather than the sum of all probes.
+    
+    Args:
+        probe (callable): Returns a result for a candidate, or None if it has none
+        candidates (list): Candidates in priority order
+        pool (ThreadPoolExecutor): Pool to run the probes on
+    
+    Returns:
+        The winning probe's result, or None if no candidate has one
+    """
+    if len(candidates) <= 1:
+        return probe(candidates[0]) if candidates else None
+        
+    futures = [pool.submit(probe, candidate) for candidate in candidates]
+    try:
+        for future in futures:
+            result = future.result()
+            if result is not None:
+                return result
+    finally:
+        # Lower-priority probes that have not started yet are no longer needed
+        for future in futures:
+            future.cancel()
+    return None
+
+
+# Runbooks fetched over HTTP, keyed by source and alert, so repeat alerts within the
+# TTL skip both the round trips and the parse
+RUNBOOK_CACHE_TTL = int(os.environ.get("RUNBOOK_CACHE_TTL", "300"))
+_RUNBOOK_CACHE = TTLCache(maxsize=256, ttl=RUNBOOK_CACHE_TTL)
+
+# File paths in each runbook repository branch, from one recursive Git Trees call,
+# so candidate paths that do not exist are skipped without a request each
+RUNBOOK_TREE_TTL = int(os.environ.get("RUNBOOK_TREE_TTL", "60"))
+_TREE_CACHE = TTLCache(maxsize=16, ttl=RUNBOOK_TREE_TTL)
+
+# Parsed runbooks fetched over HTTP with the conditional request headers to revalidate
+# them, keyed by source and path. Unchanged files come back as a 304, which skips the
+# download and parse and, on GitHub, does not count against the API rate limit
+RUNBOOK_ETAG_TTL = int(os.environ.get("RUNBOOK_ETAG_TTL", "86400"))
+_ETAG_CACHE = TTLCache(maxsize=256, ttl=RUNBOOK_ETAG_TTL)
+
+# Parsed local runbooks, keyed by path, modification time and size, so an unchanged
+# file is not read or parsed again
+_PARSED_FILES = TTLCache(maxsize=256, ttl=RUNBOOK_ETAG_TTL)
+
+
+def _validators(response):
+    """Conditional request headers that revalidate a response, empty if it has no validator"""
+    etag = response.headers.get("ETag")
+    if etag:
+        return {"If-None-Match": etag}
+    last_modified = response.headers.get("Last-Modified")
+    if last_modified:
+        return {"If-Modified-Since": last_modified}
+    return {}
+
+# Local runbook directory listings, keyed by directory and stored with its mtime, so
+# candidate lookups are set membership tests until a file is added or removed
+_DIR_LISTINGS = {}
+
+
+def _dir_entries(directory):
+    """
+    Get the names of the files in a directory, rescanning it only when its mtime changes
+    
+    Args:
+        directory (str): Directory to list
+    
+    Returns:
+        frozenset: File names, empty if the directory does not exist, or None if it
+        could not be listed, in which case every candidate has to be tried
+    """
+    try:
+        mtime = os.stat(directory).st_mtime_ns
+    except FileNotFoundError:
+        return frozenset()
+    except OSError:
+        return None
+        
+    cached = _DIR_LISTINGS.get(directory)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+        
+    try:
+        with os.scandir(directory) as entries:
+            names = frozenset(entry.name for entry in entries if entry.is_file())
+    except OSError:
+        return None
+        
+    _DIR_LISTINGS[directory] = (mtime, names)
+    return names
+
+# BeautifulSoup tree builder: lxml's C parser when installed, several times faster
+# than the pure-Python html.parser used as the fallback
+_HTML_PARSER = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+
+# Heading titles (matched as a prefix, case-insensitively) that introduce runbook steps.
+# "Remediation Steps" and "Resolution Steps" are covered by their shorter prefixes
+_STEPS_HEADINGS = ("steps", "remediation", "resolution", "how to fix", "runbook")
+
+# Level 2 or 3 markdown heading with one of those titles, and any markdown heading.
+# Anchored literal alternations, so a whole document is scanned in C without
+# backtracking rather than line by line in Python
+_STEPS_HEADING_RE = re.compile(
+    r'^[^\S\n]*#{2,3}[ \t]+(?:' + "|".join(map(re.escape, _STEPS_HEADINGS)) + ')',
+    re.MULTILINE | re.IGNORECASE
+)
+_ANY_HEADING_RE = re.compile(r'^[^\S\n]*#+[ \t]', re.MULTILINE)
+
+# Same titles anywhere in an HTML heading, as one alternation compiled at import
+_HTML_HEADING_RE = re.compile("|".join(map(re.escape, _STEPS_HEADINGS)), re.IGNORECASE)
+
+# Fast path for themed sites (MkDocs, Jekyll) that render the steps as a list directly
+# after an id'd <h2>, so the common page needs no DOM at all
+_FAST_STEPS_RE = re.compile(
+    r'<h2 id="(?:steps|remediation)"[^>]*>((?:(?!</h[1-6]).)*?)</h2>\s*<(ol|ul)\b[^>]*>(.*?)</\2>',
+    re.DOTALL | re.IGNORECASE
+)
+_HTML_ANY_HEADING_RE = re.compile(r'<h[123]\b[^>]*>(.*?)</h[123]>', re.DOTALL | re.IGNORECASE)
+_HTML_LI_RE = re.compile(r'<li\b[^>]*>(.*?)</li>', re.DOTALL | re.IGNORECASE)
+_HTML_LI_OPEN_RE = re.compile(r'<li\b', re.IGNORECASE)
+_HTML_LIST_OPEN_RE = re.compile(r'<(?:ol|ul)\b', re.IGNORECASE)
+_HTML_TAG_RE = re.compile(r'<[^>]*>')
+
+# Paragraph separator in markdown: a blank line, possibly holding only whitespace
+_BLANK_LINES_RE = re.compile(r'\n[ \t]*\n')
+
+
+def _html_text(fragment):
+    """Text of an HTML fragment the way BeautifulSoup's get_text(strip=True) joins it"""
+    return "".join(html.unescape(text).strip() for text in _HTML_TAG_RE.split(fragment))
+
+
+def _li_texts(element):
+    """Non-empty text of each list item under a BeautifulSoup element"""
+    return [text for text in (li.get_text(strip=True) for li in element.find_all('li')) if text]
+
+
+def _fast_html_steps(content):
+    """
+    Extract steps from a page whose steps list directly follows <h2 id="steps"> or
+    <h2 id="remediation">, without building a DOM
+    
+    Args:
+        content (str): HTML content
+    
+    Returns:
+        list: Steps, or None if the page does not have that exact structure and has to
+        go through BeautifulSoup
+    """
+    if 'id="steps"' not in content and 'id="remediation"' not in content:
+        return None
+    match = _FAST_STEPS_RE.search(content)
+    if not match or '<!' in match.group(3) or not _HTML_HEADING_RE.search(_html_text(match.group(1))):
+        return None
+        
+    # An earlier heading with a steps title would be the one the DOM walk picks
+    for heading in _HTML_ANY_HEADING_RE.findall(content, 0, match.start()):
+        if _HTML_HEADING_RE.search(_html_text(heading)):
+            return None
+            
+    # Nested lists and unclosed items are left to the real parser
+    items = match.group(3)
+    if _HTML_LIST_OPEN_RE.search(items):
+        return None
+    raw_items = _HTML_LI_RE.findall(items)
+    if len(raw_items) != len(_HTML_LI_OPEN_RE.findall(items)):
+        return None
+        
+    steps = [text for text in map(_html_text, raw_items) if text]
+    return steps or None
+
+
+def _heading_level(line):
+    """Level of a stripped markdown ATX heading line ("## Steps" is 2), or 0 if it is not one"""
+    level = len(line) - len(line.lstrip("#"))
+    if level and line[level:level + 1] in (" ", "\t"):
+        return level
+    return 0
+
+
+def _list_item(line):
+    """Text of a markdown list item line ("1. ...", "- ...", "* ..."), or None"""
+    stripped = line.lstrip()
+    if stripped[:2] in ("- ", "* ", "-\t", "*\t"):
+        return stripped[2:]
+    digits = len(stripped) - len(stripped.lstrip("0123456789"))
+    if digits and stripped[digits:digits + 1] == "." and stripped[digits + 1:digits + 2] in (" ", "\t"):
+        return stripped[digits + 2:]
+    return None
+
+
+def _list_items(lines):
+    """
+    Collect list items from markdown lines. Indented or wrapped lines continue the
+    current item; a blank line or heading ends it.
+    """
+    items = []
+    current = None
+    for line in lines:
+        item = _list_item(line)
+        if item is not None:
+            current = [item]
+            items.append(current)
+        elif not line.strip() or _heading_level(line.strip()):
+            current = None
+        elif current is not None:
+            current.append(line)
+    return [text for text in ("\n".join(parts).strip() for parts in items) if text]
+
+
+def _parse_markdown_steps(content):
+    """
+    Extract runbook steps from markdown, scanning only the steps section line by line
+    
+    Steps are the list items under the first "Steps"/"Remediation"/... heading, or its
+    paragraphs when that section has no list. Without such a heading, every list item
+    in the document is a step.
+    
+    Args:
+        content (str): Markdown content
+    
+    Returns:
+        list: List of steps extracted from the markdown
+    """
+    match = _STEPS_HEADING_RE.search(content)
+    if match is None:
+        # Look for any list in the document
+        return _list_items(content.splitlines())
+        
+    # The section runs from the line after the heading up to the next heading
+    start = content.find("\n", match.end())
+    if start == -1:
+        return []
+    end = _ANY_HEADING_RE.search(content, start + 1)
+    lines = content[start + 1:end.start() if end else len(content)].splitlines()
+    
+    steps = _list_items(lines)
+    if not steps:
+        # If no list found, treat paragraphs as steps, eliminating very short ones
+        paragraphs = (p.strip() for p in _BLANK_LINES_RE.split("\n".join(lines)))
+        steps = [p for p in paragraphs if len(p) > 10]
+    return steps
+
+
+@dataclass(frozen=True, slots=True)
+class Runbook:
+    """
+    A runbook that was found, as kept in the runbook cache. Immutable, so cached
+    entries cannot be changed through a result handed to a caller, and slotted to
+    keep the cache compact; converted to the tools' dict format when returned.
+    """
+    alert_name: str
+    service: str
+    steps: tuple
+    source: str
+    
+    def to_dict(self):
+        """The runbook in the dict format returned by the runbook tools"""
+        return {
+            "alertName": self.alert_name,
+            "service": self.service,
+            "steps": list(self.steps),
+            "found": True,
+            "source": self.source
+        }
+
+
+# Runbook source settings, read from the environment when the first tool or source is
+# built rather than at import, so values loaded afterwards (e.g. by load_dotenv) count
+_ENV = {}
+
+
+def reload_env():
+    """
+    Re-read the runbook source settings from the environment. They are read once, so
+    constructing tools and sources does no environment lookups; call this after
+    changing the environment at runtime.
+    """
+    _ENV.update(
+        github_token=os.environ.get("GITHUB_TOKEN"),
+        github_repo=os.environ.get("RUNBOOK_GITHUB_REPO"),
+        github_branch=os.environ.get("RUNBOOK_GITHUB_BRANCH", "main"),
+        github_path=os.environ.get("RUNBOOK_GITHUB_PATH", "runbooks"),
+        html_base_url=os.environ.get("RUNBOOK_HTML_BASE_URL"),
+        local_path=os.environ.get("RUNBOOK_LOCAL_PATH", "/runbooks")
+    )
+
+
+def _env(name):
+    """A runbook source setting, reading the environment on first use"""
+    if not _ENV:
+        reload_env()
+    return _ENV[name]
+
+
 class RunbookSourceBase:
     """Base class for runbook sources"""
+    
+    # Whether a generic runbooks file is tried after the alert-specific candidates.
+    # Sources whose runbooks are all alert-specific can turn it off to save a lookup
+    # on every miss
+    generic_fallback = True
+    
     def fetch_runbook(self, identifier):
         """Fetches a runbook from the source"""
         raise NotImplementedError("Subclasses must implement this method")
@@ -35,10 +362,10 @@ class GitHubMarkdownRunbookSource(RunbookSourceBase):
             branch (str): Branch name, defaults to 'main'
             path (str): Path to runbooks directory in the repo
         """
-        self.token = token or os.environ.get("GITHUB_TOKEN")
-        self.repo = repo or os.environ.get("RUNBOOK_GITHUB_REPO")
-        self.branch = branch or os.environ.get("RUNBOOK_GITHUB_BRANCH", "main")
-        self.path = path or os.environ.get("RUNBOOK_GITHUB_PATH", "runbooks")
+        self.token = token or _env("github_token")
+        self.repo = repo or _env("github_repo")
+        self.branch = branch or _env("github_branch")
+        self.path = path or _env("github_path")
         
         if not self.repo:
             logger.warning("No GitHub repository specified, GitHub runbook source will be unavailable")
@@ -68,46 +395,24 @@ class GitHubMarkdownRunbookSource(RunbookSourceBase):
         if not alert_name:
             return {"found": False, "message": "No alert name provided"}
             
-        # Define possible file paths to check
-        possible_paths = []
-        
-        # Try with service-specific runbook first
-        if service:
-            possible_paths.append(f"{self.path}/{service}/{alert_name}.md")
-            possible_paths.append(f"{self.path}/{service}-{alert_name}.md")
+        cache_key = ("github", self.repo, self.branch, self.path, alert_name, service)
+        cached = _RUNBOOK_CACHE.get(cache_key)
+        if cached is not None:
+            return cached.to_dict()
             
-        # Then try with just alert name
-        possible_paths.append(f"{self.path}/{alert_name}.md")
+        possible_paths = self._candidate_paths(self.path, alert_name, service, self.generic_fallback)
         
-        # Try a generic runbooks file
-        possible_paths.append(f"{self.path}/runbooks.md")
+        # Only request the candidates that exist, when the repository tree is known
+        path_index = self._path_index()
+        if path_index is not None:
+            possible_paths = [path for path in possible_paths if path in path_index]
         
-        for path in possible_paths:
-            try:
-                # GitHub API URL to fetch file content
-                url = f"https://api.github.com/repos/{self.repo}/contents/{path}?ref={self.branch}"
-                
-                response = requests.get(url, headers=self.headers, timeout=10)
-                
-                if response.status_code == 200:
-                    content_data = response.json()
-                    if content_data.get("type") == "file":
-                        # GitHub API returns content as base64 encoded
-                        content = base64.b64decode(content_data["content"]).decode("utf-8")
-                        
-                        # Parse steps from the markdown content
-                        steps = self._parse_steps(content)
-                        
-                        return {
-                            "alertName": alert_name,
-                            "service": service,
-                            "steps": steps,
-                            "found": True,
-                            "source": f"GitHub: {self.repo}/{path}"
-                        }
-            except Exception as e:
-                logger.error(f"Error fetching runbook from GitHub {path}: {str(e)}")
-                continue
+        found = _first_found(self._fetch_path, possible_paths)
+        if found:
+            path, steps = found
+            runbook = Runbook(alert_name, service, tuple(steps), f"GitHub: {self.repo}/{path}")
+            _RUNBOOK_CACHE.set(cache_key, runbook)
+            return runbook.to_dict()
                 
         # If we get here, no runbook was found
         return {
@@ -118,41 +423,112 @@ class GitHubMarkdownRunbookSource(RunbookSourceBase):
             "message": f"No runbook found for alert {alert_name}"
         }
         
-    def _parse_steps(self, content):
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _candidate_paths(base_path, alert_name, service, generic=True):
         """
-        Parse markdown content to extract steps
+        Repository paths to try for an alert, most specific first and without
+        duplicates. Memoized, since the same alerts fire over and over
+        
+        Returns:
+            tuple: Candidate file paths
+        """
+        # Try with service-specific runbook first
+        service_paths = (
+            f"{base_path}/{service}/{alert_name}.md",
+            f"{base_path}/{service}-{alert_name}.md"
+        ) if service else ()
+        
+        # Then try with just alert name, then a generic runbooks file
+        candidates = service_paths + (f"{base_path}/{alert_name}.md",)
+        if generic:
+            candidates += (f"{base_path}/runbooks.md",)
+        return tuple(dict.fromkeys(candidates))
+        
+    def _fetch_path(self, path):
+        """
+        Fetch and parse one candidate runbook file
         
         Args:
-            content (str): Markdown content
+            path (str): Path of the file in the repository
         
         Returns:
-            list: List of steps extracted from the markdown
+            tuple: (path, steps) if the file exists, otherwise None
         """
-        steps = []
+        try:
+            # GitHub API URL to fetch file content
+            url = f"https://api.github.com/repos/{self.repo}/contents/{path}?ref={self.branch}"
+            
+            cache_key = ("github", self.repo, self.branch, path)
+            cached = _ETAG_CACHE.get(cache_key)
+            headers = self.headers
+            if cached is not None:
+                headers = {**self.headers, **cached[0]}
+                
+            response = _SESSION.get(url, headers=headers, timeout=10)
+            
+            if response.status_code == 304 and cached is not None:
+                return path, cached[1]
+                
+            if response.status_code == 200:
+                content_data = response.json()
+                if content_data.get("type") == "file":
+                    # GitHub API returns content as base64 encoded
+                    content = base64.b64decode(content_data["content"]).decode("utf-8")
+                    
+                    # Parse steps from the markdown content
+                    steps = self._parse_steps(content)
+                    validators = _validators(response)
+                    if validators:
+                        _ETAG_CACHE.set(cache_key, (validators, steps))
+                    return path, steps
+        except Exception as e:
+            logger.error(f"Error fetching runbook from GitHub {path}: {str(e)}")
+        return None
         
-        # Look for H2 or H3 sections titled "Steps", "Remediation", "Resolution", etc.
-        sections = re.split(r'#{2,3}\s+(Steps|Remediation Steps|Resolution Steps|How to Fix|Runbook|Resolution|Remediation)', content, flags=re.IGNORECASE)
+    def _path_index(self):
+        """
+        Get the set of file paths in the configured branch with a single Git Trees request
         
-        if len(sections) > 1:
-            # Take the content after the heading
-            steps_section = sections[2]  # Format is [before, heading, content, heading, content, ...]
+        Returns:
+            set: File paths in the repository, or None if the tree could not be listed
+            completely, in which case every candidate path has to be probed
+        """
+        cache_key = (self.repo, self.branch)
+        index = _TREE_CACHE.get(cache_key)
+        if index is not None:
+            return index
+            
+        url = f"https://api.github.com/repos/{self.repo}/git/trees/{self.branch}?recursive=1"
+        try:
+            response = _SESSION.get(url, headers=self.headers, timeout=10)
+            if response.status_code != 200:
+                return None
+            tree = response.json()
+        except Exception as e:
+            logger.error(f"Error listing GitHub tree for {self.repo}: {str(e)}")
+            return None
             
-            # Split by numbered list items or bullet points
-            raw_steps = re.findall(r'(?:^\d+\.|\*)\s+(.+?)(?=^\d+\.|\*|$)', steps_section, re.MULTILINE | re.DOTALL)
+        entries = tree.get("tree")
+        if entries is None or tree.get("truncated"):
+            # Very large repositories are listed partially; a missing path proves nothing
+            return None
             
-            if raw_steps:
-                steps = [step.strip() for step in raw_steps]
-            else:
-                # If no numbered list found, split by newlines and treat paragraphs as steps
-                step_candidates = [s.strip() for s in steps_section.split('\n\n') if s.strip()]
-                steps = [s for s in step_candidates if len(s) > 10]  # Eliminate very short lines
-        else:
-            # Look for any numbered list in the document
-            raw_steps = re.findall(r'(?:^\d+\.|\*)\s+(.+?)(?=^\d+\.|\*|$)', content, re.MULTILINE | re.DOTALL)
-            if raw_steps:
-                steps = [step.strip() for step in raw_steps]
+        index = frozenset(entry["path"] for entry in entries if entry.get("type") == "blob")
+        _TREE_CACHE.set(cache_key, index)
+        return index
         
-        return steps
+    def _parse_steps(self, content):
+        """
+        Parse markdown content to extract steps
+        
+        Args:
+            content (str): Markdown content
+        
+        Returns:
+            list: List of steps extracted from the markdown
+        """
+        return _parse_markdown_steps(content)
 
 class GitHubPagesRunbookSource(RunbookSourceBase):
     """Fetches runbooks from GitHub Pages or any HTML page"""
@@ -164,7 +540,7 @@ class GitHubPagesRunbookSource(RunbookSourceBase):
         Args:
             base_url (str): Base URL for the GitHub Pages site
         """
-        self.base_url = base_url or os.environ.get("RUNBOOK_HTML_BASE_URL")
+        self.base_url = base_url or _env("html_base_url")
         
         if not self.base_url:
             logger.warning("No HTML base URL specified, HTML runbook source will be unavailable")
@@ -190,47 +566,19 @@ class GitHubPagesRunbookSource(RunbookSourceBase):
         if not alert_name:
             return {"found": False, "message": "No alert name provided"}
             
-        # Define possible URLs to check
-        possible_urls = []
-        
-        # Check if base_url ends with a slash
-        base_url = self.base_url
-        if not base_url.endswith('/'):
-            base_url += '/'
+        cache_key = ("html", self.base_url, alert_name, service)
+        cached = _RUNBOOK_CACHE.get(cache_key)
+        if cached is not None:
+            return cached.to_dict()
             
-        # Try with service-specific runbook first
-        if service:
-            possible_urls.append(f"{base_url}{service}/{alert_name}.html")
-            possible_urls.append(f"{base_url}runbooks/{service}/{alert_name}.html")
-            possible_urls.append(f"{base_url}runbooks/{service}-{alert_name}.html")
-            
-        # Then try with just alert name
-        possible_urls.append(f"{base_url}{alert_name}.html")
-        possible_urls.append(f"{base_url}runbooks/{alert_name}.html")
-        
-        # Try a generic runbooks page
-        possible_urls.append(f"{base_url}runbooks.html")
+        possible_urls = self._candidate_urls(self.base_url, alert_name, service, self.generic_fallback)
         
-        for url in possible_urls:
-            try:
-                response = requests.get(url, timeout=10)
-                
-                if response.status_code == 200:
-                    # Parse HTML content
-                    content = response.text
-                    steps = self._parse_steps(content)
-                    
-                    if steps:
-                        return {
-                            "alertName": alert_name,
-                            "service": service,
-                            "steps": steps,
-                            "found": True,
-                            "source": f"HTML: {url}"
-                        }
-            except Exception as e:
-                logger.error(f"Error fetching runbook from HTML {url}: {str(e)}")
-                continue
+        found = _first_found(self._fetch_url, possible_urls)
+        if found:
+            url, steps = found
+            runbook = Runbook(alert_name, service, tuple(steps), f"HTML: {url}")
+            _RUNBOOK_CACHE.set(cache_key, runbook)
+            return runbook.to_dict()
                 
         # If we get here, no runbook was found
         return {
@@ -241,6 +589,66 @@ class GitHubPagesRunbookSource(RunbookSourceBase):
             "message": f"No runbook found for alert {alert_name}"
         }
         
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _candidate_urls(base_url, alert_name, service, generic=True):
+        """
+        Page URLs to try for an alert, most specific first and without duplicates.
+        Memoized, since the same alerts fire over and over
+        
+        Returns:
+            tuple: Candidate URLs
+        """
+        # Check if base_url ends with a slash
+        if not base_url.endswith('/'):
+            base_url += '/'
+            
+        # Try with service-specific runbook first
+        service_urls = (
+            f"{base_url}{service}/{alert_name}.html",
+            f"{base_url}runbooks/{service}/{alert_name}.html",
+            f"{base_url}runbooks/{service}-{alert_name}.html"
+        ) if service else ()
+        
+        # Then try with just alert name, then a generic runbooks page
+        candidates = service_urls + (
+            f"{base_url}{alert_name}.html",
+            f"{base_url}runbooks/{alert_name}.html"
+        )
+        if generic:
+            candidates += (f"{base_url}runbooks.html",)
+        return tuple(dict.fromkeys(candidates))
+        
+    def _fetch_url(self, url):
+        """
+        Fetch and parse one candidate runbook page
+        
+        Args:
+            url (str): Page URL
+        
+        Returns:
+            tuple: (url, steps) if the page exists and has steps, otherwise None
+        """
+        try:
+            cache_key = ("html", url)
+            cached = _ETAG_CACHE.get(cache_key)
+            response = _SESSION.get(url, headers=cached[0] if cached else None, timeout=10)
+            
+            if response.status_code == 304 and cached is not None:
+                return url, cached[1]
+                
+            if response.status_code == 200:
+                # Parse HTML content
+                steps = self._parse_steps(response.text)
+                if steps:
+                    validators = _validators(response)
+                    if validators:
+                        _ETAG_CACHE.set(cache_key, (validators, steps))
+                    return url, steps
+        except Exception as e:
+            logger.error(f"Error fetching runbook from HTML {url}: {str(e)}")
+        return None
+        
     def _parse_steps(self, content):
         """
         Parse HTML content to extract steps
@@ -251,64 +659,56 @@ class GitHubPagesRunbookSource(RunbookSourceBase):
         Returns:
             list: List of steps extracted from the HTML
         """
+        steps = _fast_html_steps(content)
+        if steps is not None:
+            return steps
+            
         steps = []
         
         try:
-            soup = BeautifulSoup(content, 'html.parser')
+            soup = BeautifulSoup(content, _HTML_PARSER)
             
             # First try to find a specific section for remediation steps
             remediation_section = None
             
             # Look for headings with relevant text
             for heading in soup.find_all(['h1', 'h2', 'h3']):
-                if re.search(r'(Steps|Remediation|Resolution|How to Fix|Runbook)', heading.text, re.IGNORECASE):
+                if _HTML_HEADING_RE.search(heading.text):
                     remediation_section = heading
                     break
             
             # If we found a remediation section, extract steps from there
             if remediation_section:
-                # Get the next elements after the heading until the next heading
+                # Walk the elements after the heading once, until the next heading. The
+                # first list wins; paragraphs seen on the way are the fallback
+                paragraphs = []
+                list_seen = False
                 current = remediation_section.next_sibling
-                
-                # Look for ordered or unordered lists
-                while current and not (hasattr(current, 'name') and current.name in ['h1', 'h2', 'h3']):
-                    if hasattr(current, 'name') and current.name in ['ol', 'ul']:
-                        for li in current.find_all('li'):
-                            step_text = li.get_text(strip=True)
-                            if step_text:
-                                steps.append(step_text)
+                while current:
+                    name = getattr(current, 'name', None)
+                    if name in ('h1', 'h2', 'h3'):
                         break
+                    if name in ('ol', 'ul') and not list_seen:
+                        list_seen = True
+                        steps = _li_texts(current)
+                        if steps:
+                            break
+                    elif name == 'p':
+                        step_text = current.get_text(strip=True)
+                        if step_text and len(step_text) > 10:  # Ignore very short paragraphs
+                            paragraphs.append(step_text)
                     current = current.next_sibling
                 
                 # If no list found but there are paragraphs, treat them as steps
                 if not steps:
-                    current = remediation_section.next_sibling
-                    while current and not (hasattr(current, 'name') and current.name in ['h1', 'h2', 'h3']):
-                        if hasattr(current, 'name') and current.name == 'p':
-                            step_text = current.get_text(strip=True)
-                            if step_text and len(step_text) > 10:  # Ignore very short paragraphs
-                                steps.append(step_text)
-                        current = current.next_sibling
+                    steps = paragraphs
             
-            # If we couldn't find steps from a specific section, look for any ordered list
+            # If we couldn't find steps from a specific section, take the first ordered
+            # list with content, then the first unordered one
             if not steps:
-                for ol in soup.find_all('ol'):
-                    for li in ol.find_all('li'):
-                        step_text = li.get_text(strip=True)
-                        if step_text:
-                            steps.append(step_text)
-                    if steps:  # Take the first ordered list with content
-                        break
-            
-            # If still no steps, try unordered lists
+                steps = next(filter(None, map(_li_texts, soup.find_all('ol'))), [])
             if not steps:
-                for ul in soup.find_all('ul'):
-                    for li in ul.find_all('li'):
-                        step_text = li.get_text(strip=True)
-                        if step_text:
-                            steps.append(step_text)
-                    if steps:  # Take the first unordered list with content
-                        break
+                steps = next(filter(None, map(_li_texts, soup.find_all('ul'))), [])
                         
         except Exception as e:
             logger.error(f"Error parsing HTML content: {str(e)}")
@@ -325,7 +725,7 @@ class LocalFileRunbookSource(RunbookSourceBase):
         Args:
             base_path (str): Base path for local runbook files
         """
-        self.base_path = base_path or os.environ.get("RUNBOOK_LOCAL_PATH", "/runbooks")
+        self.base_path = base_path or _env("local_path")
         
     def fetch_runbook(self, identifier):
         """
@@ -344,39 +744,35 @@ class LocalFileRunbookSource(RunbookSourceBase):
         if not alert_name:
             return {"found": False, "message": "No alert name provided"}
             
-        # Define possible file paths to check
-        possible_paths = []
-        
-        # Try with service-specific runbook first
-        if service:
-            possible_paths.append(os.path.join(self.base_path, service, f"{alert_name}.md"))
-            possible_paths.append(os.path.join(self.base_path, f"{service}-{alert_name}.md"))
-            
-        # Then try with just alert name
-        possible_paths.append(os.path.join(self.base_path, f"{alert_name}.md"))
-        
-        # Try a generic runbooks file
-        possible_paths.append(os.path.join(self.base_path, "runbooks.md"))
+        possible_paths = self._candidate_paths(self.base_path, alert_name, service, self.generic_fallback)
         
+        # Only open the candidates present in their directory listing
+        listings = {}
         for path in possible_paths:
-            if os.path.exists(path):
-                try:
-                    with open(path, 'r') as f:
-                        content = f.read()
-                    
-                    # Parse steps from the markdown content
-                    steps = self._parse_steps(content)
-                    
-                    return {
-                        "alertName": alert_name,
-                        "service": service,
-                        "steps": steps,
-                        "found": True,
-                        "source": f"Local file: {path}"
-                    }
-                except Exception as e:
-                    logger.error(f"Error reading local runbook file {path}: {str(e)}")
-                    continue
+            directory, name = os.path.split(path)
+            if directory not in listings:
+                listings[directory] = _dir_entries(directory)
+            if listings[directory] is not None and name not in listings[directory]:
+                continue
+                
+            # Open directly rather than checking existence first; a file removed since
+            # the listing is just a miss
+            try:
+                with open(path, 'r', encoding='utf-8') as f:
+                    stat = os.fstat(f.fileno())
+                    cache_key = (path, stat.st_mtime_ns, stat.st_size)
+                    steps = _PARSED_FILES.get(cache_key)
+                    if steps is None:
+                        # Parse steps from the markdown content
+                        steps = tuple(self._parse_steps(f.read()))
+                        _PARSED_FILES.set(cache_key, steps)
+            except FileNotFoundError:
+                continue
+            except Exception as e:
+                logger.error(f"Error reading local runbook file {path}: {str(e)}")
+                continue
+            
+            return Runbook(alert_name, service, steps, f"Local file: {path}").to_dict()
                     
         # If we get here, no runbook was found
         return {
@@ -387,13 +783,33 @@ class LocalFileRunbookSource(RunbookSourceBase):
             "message": f"No runbook found for alert {alert_name}"
         }
         
+    @staticmethod
+    @lru_cache(maxsize=1024)
+    def _candidate_paths(base_path, alert_name, service, generic=True):
+        """
+        File paths to try for an alert, most specific first and without duplicates.
+        Memoized, since the same alerts fire over and over
+        
+        Returns:
+            tuple: Candidate file paths
+        """
+        # Try with service-specific runbook first
+        service_paths = (
+            os.path.join(base_path, service, f"{alert_name}.md"),
+            os.path.join(base_path, f"{service}-{alert_name}.md")
+        ) if service else ()
+        
+        # Then try with just alert name, then a generic runbooks file
+        candidates = service_paths + (os.path.join(base_path, f"{alert_name}.md"),)
+        if generic:
+            candidates += (os.path.join(base_path, "runbooks.md"),)
+        return tuple(dict.fromkeys(candidates))
+        
     def _parse_steps(self, content):
         """
-        Parse markdown content to extract steps - reuse the same parser as GitHubMarkdownRunbookSource
+        Parse markdown content to extract steps - same parser as GitHubMarkdownRunbookSource
         """
-        # Create a temporary GitHubMarkdownRunbookSource just to use its parsing method
-        github_source = GitHubMarkdownRunbookSource()
-        return github_source._parse_steps(content)
+        return _parse_markdown_steps(content)
 
 class RunbookFetchTool:
     """Tool to fetch runbooks from multiple sources"""
@@ -407,13 +823,11 @@ class RunbookFetchTool:
         self.sources.append(LocalFileRunbookSource())
         
         # Add GitHub markdown source if configured
-        github_repo = os.environ.get("RUNBOOK_GITHUB_REPO")
-        if github_repo:
+        if _env("github_repo"):
             self.sources.append(GitHubMarkdownRunbookSource())
             
         # Add HTML source if configured
-        html_base_url = os.environ.get("RUNBOOK_HTML_BASE_URL")
-        if html_base_url:
+        if _env("html_base_url"):
             self.sources.append(GitHubPagesRunbookSource())
             
         logger.info(f"Initialized runbook fetch tool with {len(self.sources)} sources")
@@ -428,17 +842,71 @@ class RunbookFetchTool:
         Returns:
             dict: Runbook data with steps from the first source that finds a runbook
         """
-        # Try each source in order until we find a runbook
-        for source in self.sources:
-            try:
-                result = source.fetch_runbook(alert_data)
-                if result.get("found", False):
-                    return result
-            except Exception as e:
-                logger.error(f"Error fetching runbook from source {source.__class__.__name__}: {str(e)}")
-                continue
+        local, remote = self._split_sources()
+        
+        # Local files are cheap, so only go to the network when they miss
+        for source in local:
+            result = self._fetch_from(source, alert_data)
+            if result is not None:
+                return result
                 
-        # If no source found a runbook, return a generic error
+        # Query the network sources concurrently, keeping the result of the highest priority one
+        result = _first_found(lambda source: self._fetch_from(source, alert_data), remote, _SOURCE_POOL)
+        return result or self._not_found(alert_data)
+        
+    async def fetch_async(self, alert_data):
+        """
+        Awaitable fetch() for callers already running an event loop
+        
+        Args:
+            alert_data (dict): Alert data containing labels and annotations
+        
+        Returns:
+            dict: Runbook data with steps from the first source that finds a runbook
+        """
+        loop = asyncio.get_running_loop()
+        local, remote = self._split_sources()
+        
+        # Local files are cheap, so only go to the network when they miss
+        for source in local:
+            result = await loop.run_in_executor(_SOURCE_POOL, self._fetch_from, source, alert_data)
+            if result is not None:
+                return result
+                
+        futures = [
+            loop.run_in_executor(_SOURCE_POOL, self._fetch_from, source, alert_data)
+            for source in remote
+        ]
+        try:
+            # Awaited in priority order, so a lower priority source never wins a race
+            for future in futures:
+                result = await future
+                if result is not None:
+                    return result
+        finally:
+            for future in futures:
+                future.cancel()
+        return self._not_found(alert_data)
+        
+    def _split_sources(self):
+        """Split the sources into the leading local file sources and the rest, in priority order"""
+        count = 0
+        while count < len(self.sources) and isinstance(self.sources[count], LocalFileRunbookSource):
+            count += 1
+        return self.sources[:count], self.sources[count:]
+        
+    def _fetch_from(self, source, alert_data):
+        """Fetch from one source, returning None unless it found a runbook"""
+        try:
+            result = source.fetch_runbook(alert_data)
+            if result.get("found", False):
+                return result
+        except Exception as e:
+            logger.error(f"Error fetching runbook from source {source.__class__.__name__}: {str(e)}")
+        return None
+        
+    def _not_found(self, alert_data):
+        """Generic error returned when no source found a runbook"""
         return {
             "alertName": alert_data.get('labels', {}).get('alertname', 'unknown'),
             "service": alert_data.get('labels', {}).get('service', ''),
@@ -452,7 +920,7 @@ class RunbookSearchTool:
     
     def __init__(self, runbook_dir=None):
         """Initialize the runbook search tool"""
-        self.runbook_dir = runbook_dir or os.environ.get("RUNBOOK_LOCAL_PATH", "/runbooks")
+        self.runbook_dir = runbook_dir or _env("local_path")
         self.fetch_tool = RunbookFetchTool()
         
     @tool("Search for relevant runbooks based on incident details")
@@ -10,6 +10,9 @@ setup(
         "python-dotenv==1.0.0",
         "crewai>=0.11.2",
         "requests>=2.31.0",
+        "orjson>=3.9.0",
+        "numpy>=1.24.0",
+        "prometheus-client>=0.17.0",
         "PyYAML>=6.0",
         "nats-py==2.4.0",
         "urllib3>=1.26.0",
@@ -19,6 +22,10 @@ setup(
         "weaviate-client>=3.0.0",
         "markdown>=3.4.1",
         
+        # Runbook tools dependencies
+        "beautifulsoup4>=4.12.0",
+        "lxml>=4.9.0",
+        
         # Notification tools dependencies
         "slack-sdk>=3.2.0",
         "webexteamssdk>=1.6.0",
@@ -0,0 +1,121 @@
+import time
+import pytest
+from unittest.mock import patch
+
+from common.tools.cache import DiskCache, TTLCache
+
+class TestTTLCache:
+    def test_get_and_set(self):
+        """Test storing and retrieving a value"""
+        cache = TTLCache(maxsize=4, ttl=30)
+        cache.set("key", {"status": "success"})
+        
+        assert cache.get("key") == {"status": "success"}
+        assert cache.get("missing") is None
+        assert cache.get("missing", "default") == "default"
+    
+    def test_expiry(self):
+        """Test that entries expire after the TTL"""
+        cache = TTLCache(maxsize=4, ttl=30)
+        
+        with patch('common.tools.cache.time.monotonic', return_value=100.0):
+            cache.set("key", "value")
+        with patch('common.tools.cache.time.monotonic', return_value=129.0):
+            assert cache.get("key") == "value"
+        with patch('common.tools.cache.time.monotonic', return_value=131.0):
+            assert cache.get("key") is None
+        
+        assert len(cache) == 0
+    
+    def test_lru_eviction(self):
+        """Test that the least recently used entry is evicted when full"""
+        cache = TTLCache(maxsize=2, ttl=30)
+        cache.set("a", 1)
+        cache.set("b", 2)
+        
+        # Touch "a" so that "b" becomes the least recently used entry
+        cache.get("a")
+        cache.set("c", 3)
+        
+        assert cache.get("a") == 1
+        assert cache.get("b") is None
+        assert cache.get("c") == 3
+    
+    def test_weight_eviction(self):
+        """Test that the least recently used entries are evicted to stay under the weight bound"""
+        cache = TTLCache(maxsize=10, ttl=30, maxweight=5, weigher=len)
+        cache.set("a", [1, 2])
+        cache.set("b", [1, 2])
+        cache.set("c", [1, 2])
+
+        assert cache.get("a") is None
+        assert cache.get("b") == [1, 2]
+        assert cache.get("c") == [1, 2]
+
+    def test_too_heavy_value_not_stored(self):
+        """Test that a value heavier than the whole bound is not cached and replaces nothing"""
+        cache = TTLCache(maxsize=10, ttl=30, maxweight=5, weigher=len)
+        cache.set("a", [1])
+        cache.set("b", [1, 2, 3, 4, 5, 6])
+
+        assert cache.get("a") == [1]
+        assert cache.get("b") is None
+
+    def test_conditional_replace(self):
+        """Test that a live entry is only overwritten when replace allows it"""
+        cache = TTLCache(maxsize=4, ttl=30)
+        longer = lambda cached, value: len(value) >= len(cached)
+        
+        with patch('common.tools.cache.time.monotonic', return_value=100.0):
+            cache.set("key", [1, 2])
+            cache.set("key", [1], replace=longer)
+            assert cache.get("key") == [1, 2]
+            cache.set("key", [1, 2, 3], replace=longer)
+            assert cache.get("key") == [1, 2, 3]
+        # An expired entry is always replaced
+        with patch('common.tools.cache.time.monotonic', return_value=200.0):
+            cache.set("key", [1], replace=longer)
+            assert cache.get("key") == [1]
+    
+    def test_clear(self):
+        """Test clearing the cache"""
+        cache = TTLCache()
+        cache.set("a", 1)
+        cache.clear()
+        
+        assert len(cache) == 0
+
+
+class TestDiskCache:
+    def test_get_and_set(self, tmp_path):
+        """Test round-tripping a JSON value through disk"""
+        cache = DiskCache(str(tmp_path), ttl=30)
+        cache.set(("endpoint", ()), {"status": "success", "metrics": ["up"]})
+        
+        assert DiskCache(str(tmp_path), ttl=30).get(("endpoint", ())) == {"status": "success", "metrics": ["up"]}
+        assert cache.get("missing", "default") == "default"
+    
+    def test_expiry(self, tmp_path):
+        """Test that files older than the TTL are ignored"""
+        cache = DiskCache(str(tmp_path), ttl=30)
+        cache.set("key", "value")
+        
+        with patch('common.tools.cache.time.time', return_value=time.time() + 31):
+            assert cache.get("key") is None
+    
+    def test_unwritable_directory(self, tmp_path):
+        """Test that write failures are ignored"""
+        blocker = tmp_path / "file"
+        blocker.write_text("")
+        cache = DiskCache(str(blocker / "cache"), ttl=30)
+        cache.set("key", "value")
+        
+        assert cache.get("key") is None
+    
+    def test_clear(self, tmp_path):
+        """Test removing all cache files"""
+        cache = DiskCache(str(tmp_path), ttl=30)
+        cache.set("key", "value")
+        cache.clear()
+        
+        assert cache.get("key") is None
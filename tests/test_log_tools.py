@@ -329,4 +329,63 @@ class TestPodLogTool:
         with pytest.raises(ValueError) as excinfo:
             tool.execute(namespace="test-ns")
         
-        assert "Either pod_name or selector must be provided" in str(excinfo.value)
\ No newline at end of file
+        assert "Either pod_name or selector must be provided" in str(excinfo.value)
+
+class TestLogHelpers:
+    def test_extract_errors(self):
+        """Test extracting error patterns from a single log line"""
+        from common.tools.log_tools import _extract_errors
+        
+        assert _extract_errors("Error: Connection refused") == (("Error", "Connection refused"),)
+        assert _extract_errors("request completed") == ()
+    
+    def test_extract_errors_memoized(self):
+        """Test that repeated log lines are served from the cache"""
+        from common.tools.log_tools import _extract_errors
+        
+        _extract_errors.cache_clear()
+        _extract_errors("Fatal: Out of memory")
+        _extract_errors("Fatal: Out of memory")
+        
+        info = _extract_errors.cache_info()
+        assert info.hits == 1
+        assert info.misses == 1
+    
+    def test_log_lines_sampling(self):
+        """Test reservoir sampling of Loki log lines"""
+        from common.tools.log_tools import _log_lines
+        
+        logs = {"result": [{"values": [[str(i), f"line {i}"] for i in range(100)]}]}
+        
+        # Without a sample size every line is returned in order
+        assert _log_lines(logs) == [f"line {i}" for i in range(100)]
+        
+        # With a sample size the result is a subset of the requested size
+        sample = _log_lines(logs, sample_size=10)
+        assert len(sample) == 10
+        assert set(sample) <= {f"line {i}" for i in range(100)}
+        
+        # A sample size larger than the input keeps everything
+        assert len(_log_lines(logs, sample_size=500)) == 100
+    
+    @patch('common.tools.log_tools.LokiQueryTool.query_logs')
+    def test_get_service_latency_one_duration_per_line(self, mock_query_logs):
+        """Test that only the first duration of each log line is counted"""
+        from common.tools.log_tools import LokiQueryTool
+        
+        mock_query_logs.return_value = {
+            "result": [
+                {
+                    "values": [
+                        ["1620000000000000000", "Request completed duration=100 upstream duration=900"],
+                        ["1620000000000000001", "Request completed duration=300"]
+                    ]
+                }
+            ]
+        }
+        
+        stats = LokiQueryTool().get_service_latency(namespace="test", service="api")
+        
+        assert stats["count"] == 2
+        assert stats["max"] == 300
+        assert stats["avg"] == 200
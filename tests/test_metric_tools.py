@@ -0,0 +1,61 @@
+import pytest
+from unittest.mock import MagicMock, patch
+from prometheus_client import REGISTRY
+
+from common.tools import metric_tools, prometheus_tools
+from common.tools.metric_tools import PrometheusQueryTool
+
+class TestPrometheusQueryTool:
+    @pytest.fixture(autouse=True)
+    def setup_mocks(self):
+        # Patch the pooled session's get to prevent actual HTTP requests
+        patcher = patch('requests.Session.get')
+        self.mock_get = patcher.start()
+
+        self.mock_response = MagicMock()
+        self.mock_response.status_code = 200
+        self.mock_response.content = (
+            b'{"status": "success", "data": {"resultType": "vector", '
+            b'"result": [{"metric": {"job": "api"}, "value": [1619712424.744, "1"]}]}}'
+        )
+        self.mock_get.return_value = self.mock_response
+
+        metric_tools._QUERY_CACHE.clear()
+        yield
+        metric_tools._QUERY_CACHE.clear()
+        patcher.stop()
+
+    def test_query_cached(self):
+        """Test that a repeated query is answered from the cache and counted as a hit"""
+        labels = {'cache': 'metric_query'}
+        hits = REGISTRY.get_sample_value('obsagent_promql_cache_hits_total', labels) or 0
+        tool = PrometheusQueryTool()
+        first = tool._query_metrics('up')
+        second = tool._query_metrics('up')
+
+        assert first['status'] == 'success'
+        assert second == first
+        assert self.mock_get.call_count == 1
+        assert REGISTRY.get_sample_value('obsagent_promql_cache_hits_total', labels) == hits + 1
+
+    def test_query_cache_disabled(self, monkeypatch):
+        """Test that PROMETHEUS_CACHE_ENABLED=false sends every query upstream"""
+        monkeypatch.setattr(prometheus_tools, 'PROMETHEUS_CACHE_ENABLED', False)
+        tool = PrometheusQueryTool()
+        tool._query_metrics('up')
+        tool._query_metrics('up')
+
+        assert self.mock_get.call_count == 2
+        assert len(metric_tools._QUERY_CACHE) == 0
+
+    def test_query_cache_keeps_more_complete_result(self):
+        """Test that a response with fewer series does not overwrite a live cache entry"""
+        cached = {'status': 'success', 'data': {'resultType': 'vector', 'result': [{}, {}]}}
+        partial = {'status': 'success', 'data': {'resultType': 'vector', 'result': [{}]}}
+        prometheus_tools._cache_put(metric_tools._QUERY_CACHE, ('up',), cached)
+
+        prometheus_tools._cache_put(
+            metric_tools._QUERY_CACHE, ('up',), partial, replace=metric_tools._more_series
+        )
+
+        assert metric_tools._QUERY_CACHE.get(('up',)) == cached
@@ -1,6 +1,9 @@
 import os
+import subprocess
+import sys
 import pytest
 from unittest.mock import Mock, patch, MagicMock
+from common.tools import notification_tools
 from common.tools.notification_tools import NotificationTools
 
 class TestNotificationTools:
@@ -23,9 +26,15 @@ class TestNotificationTools:
     @pytest.fixture
     def mock_clients(self):
         """Create mock clients for notification services"""
-        with patch('common.tools.notification_tools.WebClient') as mock_slack_client, \
-             patch('common.tools.notification_tools.PagerDutyClient') as mock_pd_client, \
-             patch('common.tools.notification_tools.WebexTeamsAPI') as mock_webex_client:
+        # Drop clients shared by earlier tests so each test gets fresh mocks
+        notification_tools._CLIENTS.clear()
+        for breaker in notification_tools._BREAKERS.values():
+            breaker.reset()
+        NotificationTools._instance = None
+        
+        with patch('slack_sdk.WebClient') as mock_slack_client, \
+             patch('pdpyras.APISession') as mock_pd_client, \
+             patch('webexteamssdk.WebexTeamsAPI') as mock_webex_client:
             
             # Configure the mock Slack client
             mock_slack_instance = MagicMock()
@@ -67,6 +76,28 @@ class TestNotificationTools:
         assert tool.webex_default_room_id == 'test-room-id'
         assert tool.webex_client is not None
     
+    def test_import_does_not_load_sdks(self):
+        """Test that importing the module defers loading the vendor SDKs"""
+        code = (
+            "import sys, common.tools.notification_tools; "
+            "print(any(m in sys.modules for m in ('slack_sdk', 'pdpyras', 'webexteamssdk')))"
+        )
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert output.stdout.strip() == 'False'
+    
+    def test_clients_shared_between_instances(self, env_setup, mock_clients):
+        """Test that instances with the same tokens reuse the same SDK clients"""
+        first = NotificationTools()
+        second = NotificationTools()
+        
+        assert first.slack_client is second.slack_client
+        assert first.pagerduty_client is second.pagerduty_client
+        assert first.webex_client is second.webex_client
+    
+    def test_instance_is_singleton(self, env_setup, mock_clients):
+        """Test that instance() returns one shared NotificationTools"""
+        assert NotificationTools.instance() is NotificationTools.instance()
+    
     def test_send_slack_message(self, env_setup, mock_clients):
         """Test sending a message to Slack"""
         tool = NotificationTools()
@@ -105,6 +136,90 @@ class TestNotificationTools:
         assert result['status'] == 'error'
         assert 'Error sending message' in result['error']
     
+    def test_send_slack_message_batched(self, env_setup, mock_clients):
+        """Test that batched Slack messages for one channel are posted together"""
+        tool = NotificationTools()
+        first = tool.send_slack_message(message='First alert', batch=True)
+        second = tool.send_slack_message(message='Second alert', batch=True)
+        tool.flush_slack_queue()
+        
+        # Verify the messages were queued and then posted in a single call
+        assert first['status'] == 'queued'
+        assert second['status'] == 'queued'
+        mock_clients['slack'].chat_postMessage.assert_called_once()
+        call_args = mock_clients['slack'].chat_postMessage.call_args
+        assert call_args.kwargs['channel'] == '#test-channel'
+        assert call_args.kwargs['text'] == 'First alert\n\nSecond alert'
+        assert len(call_args.kwargs['blocks']) == 2
+    
+    def test_send_slack_message_batched_repeats(self, env_setup, mock_clients):
+        """Test that identical batched Slack messages are collapsed into one block"""
+        tool = NotificationTools()
+        for _ in range(3):
+            tool.send_slack_message(message='Disk full', batch=True)
+        tool.flush_slack_queue()
+        
+        mock_clients['slack'].chat_postMessage.assert_called_once()
+        call_args = mock_clients['slack'].chat_postMessage.call_args
+        assert call_args.kwargs['text'] == 'Disk full\n_(repeated 3 times)_'
+        assert len(call_args.kwargs['blocks']) == 1
+    
+    def test_send_slack_message_retries_rate_limit(self, env_setup, mock_clients):
+        """Test that a rate-limited Slack post is retried after Retry-After"""
+        from slack_sdk.errors import SlackApiError
+        
+        rate_limited = Mock(status_code=429, headers={'Retry-After': '1'})
+        mock_clients['slack'].chat_postMessage.side_effect = [
+            SlackApiError("ratelimited", rate_limited),
+            {'ok': True}
+        ]
+        
+        tool = NotificationTools()
+        with patch('common.tools.notification_tools.time.sleep') as mock_sleep:
+            result = tool.send_slack_message(message='Test message')
+        
+        # Verify the second attempt succeeded after waiting as instructed
+        assert result['status'] == 'success'
+        assert mock_clients['slack'].chat_postMessage.call_count == 2
+        mock_sleep.assert_called_once_with(1.0)
+    
+    def test_send_slack_message_long_retry_after_opens_circuit(self, env_setup, mock_clients):
+        """Test that a Retry-After above the cap fails at once and opens the circuit"""
+        from slack_sdk.errors import SlackApiError
+        
+        rate_limited = Mock(status_code=429, headers={'Retry-After': '30'})
+        mock_clients['slack'].chat_postMessage.side_effect = SlackApiError("ratelimited", rate_limited)
+        
+        tool = NotificationTools()
+        with patch('common.tools.notification_tools.time.sleep') as mock_sleep:
+            first = tool.send_slack_message(message='Test message')
+            second = tool.send_slack_message(message='Test message')
+        
+        # Verify nothing waited on the caller's thread and the next call failed fast
+        assert first['status'] == 'error'
+        assert second['status'] == 'circuit_open'
+        assert mock_clients['slack'].chat_postMessage.call_count == 1
+        mock_sleep.assert_not_called()
+    
+    def test_send_slack_message_circuit_open(self, env_setup, mock_clients):
+        """Test that calls are skipped while the Slack circuit is open"""
+        from slack_sdk.errors import SlackApiError
+        
+        unavailable = Mock(status_code=503, headers={})
+        mock_clients['slack'].chat_postMessage.side_effect = SlackApiError("unavailable", unavailable)
+        
+        tool = NotificationTools()
+        with patch('common.tools.notification_tools.time.sleep'):
+            for _ in range(notification_tools.CIRCUIT_FAILURE_THRESHOLD):
+                assert tool.send_slack_message(message='Test message')['status'] == 'error'
+        
+        calls = mock_clients['slack'].chat_postMessage.call_count
+        result = tool.send_slack_message(message='Test message')
+        
+        # Verify the open circuit short-circuits without calling Slack
+        assert result['status'] == 'circuit_open'
+        assert mock_clients['slack'].chat_postMessage.call_count == calls
+    
     def test_create_pagerduty_incident(self, env_setup, mock_clients):
         """Test creating a PagerDuty incident"""
         tool = NotificationTools()
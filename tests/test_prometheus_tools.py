@@ -1,16 +1,21 @@
 import os
+import subprocess
+import sys
 import pytest
 import json
-from unittest.mock import Mock, patch, MagicMock, call
+import requests
+from unittest.mock import Mock, patch, MagicMock, PropertyMock, call
 from datetime import datetime, timedelta
+from prometheus_client import REGISTRY
 
-from common.tools.prometheus_tools import PrometheusTools
+from common.tools import prometheus_tools
+from common.tools.prometheus_tools import PrometheusTools, PrometheusQueryError
 
 class TestPrometheusTools:
     @pytest.fixture(autouse=True)
-    def setup_mocks(self):
-        # Create proper patch for requests.get to prevent actual HTTP requests
-        patcher = patch('requests.get')
+    def setup_mocks(self, tmp_path):
+        # Patch the pooled session's get to prevent actual HTTP requests
+        patcher = patch('requests.Session.get')
         self.mock_get = patcher.start()
         
         # Set up mock response
@@ -28,15 +33,34 @@ class TestPrometheusTools:
                 ]
             }
         }
+        # Raw body mirrors whatever json() is configured to return
+        type(self.mock_response).content = PropertyMock(
+            side_effect=lambda: json.dumps(self.mock_response.json.return_value).encode()
+        )
         self.mock_get.return_value = self.mock_response
         
+        # Start every test without cached responses
+        prometheus_tools._LISTING_CACHE.clear()
+        prometheus_tools._QUERY_CACHE.clear()
+        prometheus_tools._METADATA_CACHE.clear()
+        prometheus_tools._BREAKERS.clear()
+        # Keep persisted listings in a per-test directory
+        disk_patchers = [
+            patch.object(prometheus_tools._METRICS_DISK_CACHE, 'directory', str(tmp_path)),
+            patch.object(prometheus_tools._METADATA_DISK_CACHE, 'directory', str(tmp_path))
+        ]
+        for disk_patcher in disk_patchers:
+            disk_patcher.start()
+        
         # Environment variables
         os.environ['PROMETHEUS_URL'] = 'http://test-prometheus:9090'
         
         yield
         
-        # Stop the patcher after the test
+        # Stop the patchers after the test
         patcher.stop()
+        for disk_patcher in disk_patchers:
+            disk_patcher.stop()
     
     def test_init(self):
         """Test initialization of PrometheusTools"""
@@ -49,6 +73,51 @@ class TestPrometheusTools:
         tool = PrometheusTools(prometheus_url='http://custom-prometheus:9090')
         assert tool.prometheus_url == 'http://custom-prometheus:9090'
     
+    def test_init_with_session(self):
+        """Test that an injected session is reused for requests"""
+        session = MagicMock()
+        session.get.return_value = self.mock_response
+        
+        tool = PrometheusTools(session=session)
+        tool.query('up')
+        
+        assert tool.session is session
+        session.get.assert_called_once()
+        self.mock_get.assert_not_called()
+    
+    def test_session_accepts_compression(self):
+        """Test that the session advertises every encoding urllib3 can decode"""
+        session = prometheus_tools._build_session()
+        
+        assert 'gzip' in session.headers['Accept-Encoding']
+        from urllib3.util.request import ACCEPT_ENCODING
+        assert session.headers['Accept-Encoding'] == ACCEPT_ENCODING
+    
+    def test_import_does_not_load_requests(self):
+        """Test that importing the module defers loading requests until a session is built"""
+        code = "import sys, common.tools.prometheus_tools; print('requests' in sys.modules)"
+        output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+        assert output.stdout.strip() == 'False'
+    
+    def test_default_session_shared(self):
+        """Test that tools without an injected session share one pooled session"""
+        assert PrometheusTools().session is PrometheusTools().session
+    
+    def test_close_shared_sessions(self):
+        """Test that the shared sessions can be closed at shutdown"""
+        session = PrometheusTools().session
+        with patch.object(session, 'close') as mock_close:
+            prometheus_tools.close_shared_sessions()
+        mock_close.assert_called_once()
+    
+    def test_request_timeout(self):
+        """Test that every request carries a timeout"""
+        tool = PrometheusTools()
+        tool.query('up')
+        
+        args, kwargs = self.mock_get.call_args
+        assert kwargs['timeout'] == (3.05, 30.0)
+    
     def test_query(self):
         """Test executing a simple query"""
         tool = PrometheusTools()
@@ -92,6 +161,19 @@ class TestPrometheusTools:
         assert result['status'] == 'error'
         assert 'error' in result
         assert 'Query failed with status 400' in result['error']
+        assert result['status_code'] == 400
+        assert result['retryable'] is False
+    
+    def test_query_transient_error_retryable(self):
+        """Test that server errors are flagged as retryable"""
+        self.mock_response.status_code = 503
+        self.mock_response.text = "Service unavailable"
+        
+        tool = PrometheusTools()
+        result = tool.query('up')
+        
+        assert result['status'] == 'error'
+        assert result['retryable'] is True
     
     def test_range_query(self):
         """Test executing a range query"""
@@ -138,6 +220,65 @@ class TestPrometheusTools:
         assert kwargs['params']['end'] == end
         assert kwargs['params']['step'] == '15s'
     
+    def test_range_query_aligned_to_step(self):
+        """Test that Unix bounds are snapped down to a multiple of the step"""
+        tool = PrometheusTools()
+        tool.range_query('up', start=1000.7, end=1125, step='30s')
+        
+        args, kwargs = self.mock_get.call_args
+        assert kwargs['params']['start'] == 990
+        assert kwargs['params']['end'] == 1110
+        assert kwargs['headers'] == {'Cache-Control': 'max-age=30'}
+    
+    def test_range_query_unaligned(self):
+        """Test that align=False passes the bounds through unchanged"""
+        tool = PrometheusTools()
+        tool.range_query('up', start=1000.7, end=1125, step='30s', align=False)
+        
+        args, kwargs = self.mock_get.call_args
+        assert kwargs['params']['start'] == 1000.7
+        assert kwargs['params']['end'] == 1125
+    
+    def test_iter_range_query_windows(self):
+        """Test that iter_range_query splits a long range into bounded windows"""
+        tool = PrometheusTools()
+        results = list(tool.iter_range_query('up', 0, 250, '10s', max_points=10))
+        
+        # 26 points at 10s steps, at most 10 per window
+        assert len(results) == 3
+        windows = [(kwargs['params']['start'], kwargs['params']['end']) for args, kwargs in self.mock_get.call_args_list]
+        assert windows == [(0, 90), (100, 190), (200, 250)]
+    
+    def test_stream_range_query(self):
+        """Test that stream_range_query yields each series of each window"""
+        self.mock_response.json.return_value = {
+            'status': 'success',
+            'data': {
+                'resultType': 'matrix',
+                'result': [
+                    {'metric': {'job': 'a'}, 'values': [[0, '1']]},
+                    {'metric': {'job': 'b'}, 'values': [[0, '2']]}
+                ]
+            }
+        }
+        
+        tool = PrometheusTools()
+        series = list(tool.stream_range_query('up', 0, 150, '10s', max_points=10))
+        
+        # Two windows of two series each
+        assert [labels['job'] for labels, values in series] == ['a', 'b', 'a', 'b']
+        assert series[1][1] == [[0, '2']]
+    
+    def test_stream_range_query_error(self):
+        """Test that a failed window raises with the error response attached"""
+        self.mock_response.status_code = 400
+        self.mock_response.text = 'bad query'
+        
+        tool = PrometheusTools()
+        with pytest.raises(PrometheusQueryError) as excinfo:
+            list(tool.stream_range_query('up{', 0, 150, '10s'))
+        assert excinfo.value.response['status'] == 'error'
+    
     def test_get_service_health(self):
         """Test get_service_health method"""
         # Configure mock to return health data
@@ -196,6 +337,49 @@ class TestPrometheusTools:
         args, kwargs = self.mock_get.call_args
         assert 'query' in kwargs['params']
         
+    def test_get_resource_usage_all(self):
+        """Test get_resource_usage fetching every resource type concurrently"""
+        self.mock_response.json.return_value = {
+            'status': 'success',
+            'data': {
+                'resultType': 'vector',
+                'result': [
+                    {
+                        'metric': {'service': 'api'},
+                        'value': [1619712424.744, '0.75']
+                    }
+                ]
+            }
+        }
+        
+        tool = PrometheusTools()
+        result = tool.get_resource_usage('api', 'all')
+        
+        # Verify one query per resource type was made
+        assert result['status'] == 'success'
+        assert set(result['usage']) == {'cpu', 'memory'}
+        assert result['usage']['cpu']['usage'] == 0.75
+        assert self.mock_get.call_count == 2
+        
+    def test_query_many(self):
+        """Test query_many returns results keyed by query name"""
+        tool = PrometheusTools()
+        result = tool.query_many({'a': 'up', 'b': 'up == 0'})
+        
+        assert set(result) == {'a', 'b'}
+        assert result['a']['status'] == 'success'
+        queries = {kwargs['params']['query'] for args, kwargs in self.mock_get.call_args_list}
+        assert queries == {'up', 'up == 0'}
+        
+    def test_invalid_service_rejected(self):
+        """Test that service names that could inject PromQL are rejected"""
+        tool = PrometheusTools()
+        result = tool.get_service_health('api"} or vector(1) or up{x="')
+        
+        assert result['status'] == 'error'
+        assert 'Invalid service' in result['error']
+        self.mock_get.assert_not_called()
+        
     def test_get_resource_usage_unsupported(self):
         """Test get_resource_usage with unsupported resource type"""
         tool = PrometheusTools()
@@ -243,6 +427,67 @@ class TestPrometheusTools:
         args, kwargs = self.mock_get.call_args
         assert 'query' in kwargs['params']
     
+    def test_get_service_dependencies_with_callers(self):
+        """Test fetching dependencies and callers in a single query"""
+        self.mock_response.json.return_value = {
+            'status': 'success',
+            'data': {
+                'resultType': 'vector',
+                'result': [
+                    {
+                        'metric': {'destination_service': 'database', 'direction': 'downstream'},
+                        'value': [1619712424.744, '100']
+                    },
+                    {
+                        'metric': {'source_service': 'frontend', 'direction': 'upstream'},
+                        'value': [1619712424.744, '20']
+                    }
+                ]
+            }
+        }
+        
+        tool = PrometheusTools()
+        result = tool.get_service_dependencies('api', include_callers=True)
+        
+        # Verify both directions came back from one request
+        assert result['dependencies'] == [{'service': 'database', 'calls': 100.0}]
+        assert result['callers'] == [{'service': 'frontend', 'calls': 20.0}]
+        self.mock_get.assert_called_once()
+        args, kwargs = self.mock_get.call_args
+        assert ' or ' in kwargs['params']['query']
+    
+    def test_bulk_query_preserves_order(self):
+        """Test that bulk_query returns one result per query, in order"""
+        tool = PrometheusTools()
+        results = tool.bulk_query(['up', 'up == 0', 'vector(1)'])
+        
+        assert len(results) == 3
+        assert all(result['status'] == 'success' for result in results)
+        queries = [kwargs['params']['query'] for args, kwargs in self.mock_get.call_args_list]
+        assert sorted(queries) == sorted(['up', 'up == 0', 'vector(1)'])
+    
+    def test_get_services_overview(self):
+        """Test probing health and usage for several services at once"""
+        tool = PrometheusTools()
+        result = tool.get_services_overview(['api', 'db'])
+        
+        assert result['status'] == 'success'
+        assert set(result['services']) == {'api', 'db'}
+        assert result['services']['db']['health']['health'] == 'healthy'
+        assert result['services']['db']['memory']['usage'] == 1.0
+        assert self.mock_get.call_count == 6
+    
+    def test_snapshot(self):
+        """Test snapshot probing health, usage and dependencies together"""
+        tool = PrometheusTools()
+        result = tool.snapshot('api')
+        
+        assert result['status'] == 'success'
+        assert result['health']['health'] == 'healthy'
+        assert result['cpu']['usage'] == 1.0
+        assert result['dependencies']['status'] == 'success'
+        assert self.mock_get.call_count == 4
+    
     def test_list_metrics(self):
         """Test list_metrics method"""
         # Configure mock to return metrics data
@@ -265,6 +510,111 @@ class TestPrometheusTools:
         args, kwargs = self.mock_get.call_args
         assert 'http://test-prometheus:9090/api/v1/label/__name__/values' in args[0]
     
+    def test_list_metrics_cached(self):
+        """Test that repeated list_metrics calls reuse the cached listing"""
+        self.mock_response.json.return_value = {
+            'status': 'success',
+            'data': ['up']
+        }
+        
+        tool = PrometheusTools()
+        first = tool.list_metrics()
+        second = tool.list_metrics()
+        
+        assert first == second
+        self.mock_get.assert_called_once()
+    
+    def test_list_metrics_survives_restart(self):
+        """Test that a fresh process reloads metric names from the disk cache"""
+        self.mock_response.json.return_value = {
+            'status': 'success',
+            'data': ['up']
+        }
+        
+        first = PrometheusTools().list_metrics()
+        # Simulate a restart: the in-memory cache is gone, the disk cache is not
+        prometheus_tools._LISTING_CACHE.clear()
+        second = PrometheusTools().list_metrics()
+        
+        assert second == first
+        self.mock_get.assert_called_once()
+    
+    def test_cache_hits_counted_per_cache(self):
+        """Test that memory and disk cache hits are counted under their own label"""
+        def hits(cache):
+            return REGISTRY.get_sample_value('obsagent_promql_cache_hits_total', {'cache': cache}) or 0
+        
+        self.mock_response.json.return_value = {'status': 'success', 'data': ['up']}
+        memory, disk = hits('memory'), hits('disk')
+        
+        tool = PrometheusTools()
+        tool.list_metrics()
+        tool.list_metrics()
+        prometheus_tools._LISTING_CACHE.clear()
+        tool.list_metrics()
+        
+        assert hits('memory') == memory + 1
+        assert hits('disk') == disk + 1
+    
+    def test_connection_error_retryable(self):
+        """Test that timeouts and connection errors become retryable error results"""
+        self.mock_get.side_effect = requests.exceptions.ConnectTimeout('timed out')
+        
+        result = PrometheusTools().query('up')
+        
+        assert result['status'] == 'error'
+        assert result['retryable'] is True
+        assert 'timed out' in result['error']
+    
+    def test_circuit_opens_after_repeated_failures(self):
+        """Test that calls fail fast once Prometheus keeps failing"""
+        self.mock_get.side_effect = requests.exceptions.ConnectionError('refused')
+        tool = PrometheusTools()
+        
+        for i in range(prometheus_tools.PROM_CIRCUIT_FAILURES):
+            tool.query(f'up{i}')
+        calls = self.mock_get.call_count
+        result = tool.query('up')
+        
+        assert 'circuit open' in result['error']
+        assert self.mock_get.call_count == calls
+    
+    def test_query_cached(self):
+        """Test that identical queries reuse the cached response"""
+        tool = PrometheusTools()
+        first = tool.query('up')
+        second = tool.query('up')
+        
+        assert first == second
+        self.mock_get.assert_called_once()
+    
+    def test_query_uncached(self):
+        """Test that cache=False neither reads nor fills the query cache"""
+        tool = PrometheusTools()
+        tool.query('up', cache=False)
+        tool.query('up', cache=False)
+        
+        assert self.mock_get.call_count == 2
+        assert len(prometheus_tools._QUERY_CACHE) == 0
+    
+    def test_sample_count(self):
+        """Test the cache weight of instant and range results"""
+        matrix = {'data': {'result': [{'values': [[1, '1'], [2, '2']]}, {'values': [[1, '3']]}]}}
+        vector = {'data': {'result': [{'value': [1, '1']}, {'value': [1, '2']}]}}
+        
+        assert prometheus_tools._sample_count(matrix) == 3
+        assert prometheus_tools._sample_count(vector) == 2
+        assert prometheus_tools._sample_count({'data': {'result': []}}) == 1
+    
+    def test_query_cache_disabled(self, monkeypatch):
+        """Test that PROMETHEUS_CACHE_ENABLED=false sends every query upstream"""
+        monkeypatch.setattr(prometheus_tools, 'PROMETHEUS_CACHE_ENABLED', False)
+        tool = PrometheusTools()
+        tool.query('up')
+        tool.query('up')
+        
+        assert self.mock_get.call_count == 2
+    
     def test_get_metric_metadata(self):
         """Test get_metric_metadata method"""
         # Configure mock to return metadata
@@ -375,4 +725,5 @@ class TestPrometheusTools:
         # Verify list_targets was called
         self.mock_get.assert_called_once()
         args, kwargs = self.mock_get.call_args
-        assert 'http://test-prometheus:9090/api/v1/targets' in args[0]
\ No newline at end of file
+        assert 'http://test-prometheus:9090/api/v1/targets' in args[0]
+        assert kwargs['params'] == {'state': 'active'}
\ No newline at end of file
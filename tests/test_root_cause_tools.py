@@ -62,6 +62,18 @@ class TestRootCauseTools:
         # The implementation should generally find more correlations with a lower threshold
         assert low_corr_count >= high_corr_count
     
+    def test_correlation_analysis_scores(self):
+        """Test pairwise scores and that only pairs above the threshold are kept"""
+        events = [{"component": c} for c in ["a", "a", "b", "c", "c", "c"]]
+        
+        result = correlation_analysis(events, correlation_threshold=0.5)
+        
+        assert result["correlations"] == {
+            "a": {"b": pytest.approx(2 / 3)},
+            "b": {},
+            "c": {"a": pytest.approx(0.6), "b": pytest.approx(0.75)}
+        }
+    
     def test_correlation_analysis_empty_events(self):
         """Test correlation analysis with empty events list"""
         result = correlation_analysis([])
@@ -186,6 +198,24 @@ class TestRootCauseTools:
         # Should not have transitive dependencies
         assert "transitive_dependencies" not in result_without_transitive["impact_graph"]["service-a"]
     
+    def test_dependency_analysis_shared_and_cyclic(self):
+        """Test transitive dependencies over shared subgraphs and cycles"""
+        services = ["service-d", "service-a", "service-b", "service-c"]
+        dependency_data = {
+            "service-a": ["service-b", "service-c"],
+            "service-b": ["service-d"],
+            "service-c": ["service-d"],
+            "service-d": ["service-b"]
+        }
+        
+        result = dependency_analysis(services, dependency_data=dependency_data)
+        graph = result["impact_graph"]
+        
+        assert graph["service-a"]["transitive_dependencies"] == ["service-b", "service-c", "service-d"]
+        assert graph["service-b"]["transitive_dependencies"] == ["service-b", "service-d"]
+        assert graph["service-d"]["transitive_dependencies"] == ["service-b", "service-d"]
+        assert graph["service-d"]["dependents"] == ["service-b", "service-c"]
+    
     def test_dependency_analysis_empty_services(self):
         """Test dependency analysis with empty services list"""
         result = dependency_analysis([])
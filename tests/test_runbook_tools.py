@@ -0,0 +1,556 @@
+import asyncio
+import importlib.util
+import os
+import subprocess
+import sys
+import pytest
+from unittest.mock import patch, MagicMock
+
+from common.tools import runbook_tools
+from common.tools.runbook_tools import (
+    GitHubMarkdownRunbookSource, GitHubPagesRunbookSource, LocalFileRunbookSource, RunbookFetchTool
+)
+
+def test_import_leaves_logging_unconfigured():
+    """Test that importing the module does not install root logging handlers"""
+    code = (
+        "import logging; import common.tools.runbook_tools; "
+        "print(logging.getLogger().handlers)"
+    )
+    output = subprocess.run([sys.executable, "-c", code], capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == '[]'
+
+
+class TestMarkdownParseSteps:
+    def test_numbered_steps_section(self):
+        """Test extracting a numbered list under a Steps heading"""
+        content = "# HighCPU\n\nIntro text.\n\n## Steps\n\n1. Check the dashboard\n2. Restart the pod\n"
+
+        steps = GitHubMarkdownRunbookSource()._parse_steps(content)
+
+        assert steps == ['Check the dashboard', 'Restart the pod']
+
+    def test_steps_with_emphasis_and_continuations(self):
+        """Test that emphasis, bullets and wrapped lines stay within their item"""
+        content = (
+            "## Steps\n\n"
+            "1. Check the dashboard\n"
+            "2. Restart the pod\n   with kubectl\n"
+            "- Escalate to **on-call**\n\n"
+            "## Notes\nOther text\n"
+        )
+
+        steps = GitHubMarkdownRunbookSource()._parse_steps(content)
+
+        assert steps == [
+            'Check the dashboard',
+            'Restart the pod\n   with kubectl',
+            'Escalate to **on-call**'
+        ]
+
+    def test_long_document_parses_quickly(self):
+        """Test that a large runbook without list items does not backtrack"""
+        content = "## Steps\n\n" + "word * " * 20000
+
+        steps = GitHubMarkdownRunbookSource()._parse_steps(content)
+
+        assert len(steps) == 1
+
+    def test_section_ends_at_next_heading(self):
+        """Test that only items under the steps heading are collected"""
+        content = (
+            "## Symptoms\n\n- High latency\n\n"
+            "### How to fix\n\n10. Drain the node\n* Cordon it\n\n"
+            "## Escalation\n\n- Page the SRE\n"
+        )
+
+        steps = GitHubMarkdownRunbookSource()._parse_steps(content)
+
+        assert steps == ['Drain the node', 'Cordon it']
+
+    def test_combined_heading_titles(self):
+        """Test that longer titles are matched through their shorter prefixes"""
+        content = "## Background\n\n- not a step\n\n### Resolution Steps\n\n1. Fail over\n"
+
+        assert GitHubMarkdownRunbookSource()._parse_steps(content) == ['Fail over']
+
+    def test_only_level_two_and_three_headings_start_the_section(self):
+        """Test that deeper headings with a steps title are not the steps section"""
+        content = "#### Steps\n\n- ignored\n\n  ## Runbook\n\n1. Page the owner\n\n# Appendix\n\n- extra\n"
+
+        assert GitHubMarkdownRunbookSource()._parse_steps(content) == ['Page the owner']
+
+    def test_paragraph_steps(self):
+        """Test falling back to paragraphs when the section has no list"""
+        content = "## Remediation\n\nFirst paragraph is long enough.\n\nshort\n\nSecond paragraph long enough."
+
+        steps = GitHubMarkdownRunbookSource()._parse_steps(content)
+
+        assert steps == ['First paragraph is long enough.', 'Second paragraph long enough.']
+
+    def test_paragraphs_split_on_whitespace_lines(self):
+        """Test that a line holding only whitespace separates paragraphs"""
+        content = "## Resolution\n\nFirst paragraph is long enough.\n   \nSecond paragraph long enough."
+
+        steps = GitHubMarkdownRunbookSource()._parse_steps(content)
+
+        assert steps == ['First paragraph is long enough.', 'Second paragraph long enough.']
+
+    def test_list_without_heading(self):
+        """Test extracting any numbered list when there is no steps heading"""
+        steps = GitHubMarkdownRunbookSource()._parse_steps("1. a thing\n2. another\n")
+
+        assert steps == ['a thing', 'another']
+
+    def test_no_steps(self):
+        """Test a document without steps"""
+        assert GitHubMarkdownRunbookSource()._parse_steps("Just some notes.") == []
+
+
+class TestHTMLParseSteps:
+    def test_list_after_heading(self):
+        """Test extracting the list that follows a steps heading"""
+        content = "<h2>Steps</h2><ol><li>One</li><li>Two</li></ol><h2>Other</h2><ul><li>z</li></ul>"
+
+        assert GitHubPagesRunbookSource()._parse_steps(content) == ['One', 'Two']
+
+    def test_paragraphs_after_heading(self):
+        """Test falling back to paragraphs in the steps section"""
+        content = "<h2>Remediation</h2><p>Paragraph that is long</p><p>tiny</p>"
+
+        assert GitHubPagesRunbookSource()._parse_steps(content) == ['Paragraph that is long']
+
+    def test_paragraphs_around_empty_list(self):
+        """Test that paragraphs on both sides of an empty list are used as steps"""
+        content = (
+            "<h2>Resolution</h2><p>Check the recent deploys</p><ul><li></li></ul>"
+            "<p>Roll back the last release</p><h2>Other</h2><p>Not part of the steps</p>"
+        )
+
+        assert GitHubPagesRunbookSource()._parse_steps(content) == [
+            'Check the recent deploys', 'Roll back the last release'
+        ]
+
+    @pytest.mark.parametrize("content", [
+        '<h1>HighCPU</h1><h2 id="steps">Steps<a href="#steps">&para;</a></h2>\n'
+        '<ol>\n<li>Check <code>top</code> &amp; load</li>\n<li> Restart </li>\n</ol><h2>Other</h2>',
+        '<h2 id="remediation">Remediation</h2><ul class="x"><li>Drain</li><li></li></ul>',
+        '<h2 id="steps">Steps</h2><p>Restart the payment service pods</p><h2>Appendix</h2>'
+        '<ol><li>unrelated</li></ol>',
+    ])
+    def test_fast_path_matches_dom_walk(self, content):
+        """Test that the fast path, where it applies, gives the same steps as BeautifulSoup"""
+        with patch.object(runbook_tools, '_fast_html_steps', return_value=None):
+            expected = GitHubPagesRunbookSource()._parse_steps(content)
+
+        assert GitHubPagesRunbookSource()._parse_steps(content) == expected
+
+    def test_fast_path_skips_beautifulsoup(self):
+        """Test that pages with the well-known structure are parsed without BeautifulSoup"""
+        content = '<h2 id="steps">Steps</h2>\n<ol><li>Drain</li><li>Cordon</li></ol>'
+
+        with patch.object(runbook_tools, 'BeautifulSoup') as mock_soup:
+            steps = GitHubPagesRunbookSource()._parse_steps(content)
+
+        assert steps == ['Drain', 'Cordon']
+        mock_soup.assert_not_called()
+
+    @pytest.mark.parametrize("content", [
+        '<h2>Runbook</h2><p>Read this first please</p><h2 id="steps">Steps</h2><ol><li>One</li></ol>',
+        '<h2 id="steps">Steps</h2><ol><li>One<ul><li>Nested</li></ul></li></ol>',
+        '<h2 id="steps">Steps</h2><ol><li>One<li>Two</ol>',
+        '<h2 id="steps">Steps</h2><div><ol><li>One</li></ol></div>',
+        '<h2 id="steps">Steps</h2><p>Restart the payment service pods</p><h2>Appendix</h2>'
+        '<ol><li>unrelated</li></ol>',
+    ])
+    def test_fast_path_falls_back(self, content):
+        """Test that pages outside the well-known structure still go through BeautifulSoup"""
+        assert runbook_tools._fast_html_steps(content) is None
+
+    def test_uses_fastest_available_parser(self):
+        """Test that pages outside the fast path are parsed with lxml when it is installed"""
+        with patch.object(runbook_tools, 'BeautifulSoup', wraps=runbook_tools.BeautifulSoup) as mock_soup:
+            GitHubPagesRunbookSource()._parse_steps("<ol><li>One</li></ol>")
+
+        expected = "lxml" if importlib.util.find_spec("lxml") else "html.parser"
+        assert mock_soup.call_args[0][1] == expected
+
+    def test_first_ordered_list(self):
+        """Test preferring the first ordered list when there is no steps heading"""
+        content = "<ul><li>unordered</li></ul><ol><li>ordered</li></ol>"
+
+        assert GitHubPagesRunbookSource()._parse_steps(content) == ['ordered']
+
+
+class TestLocalFileRunbookSource:
+    @pytest.fixture(autouse=True)
+    def clear_listings(self):
+        runbook_tools._DIR_LISTINGS.clear()
+        runbook_tools._PARSED_FILES.clear()
+        yield
+        runbook_tools._DIR_LISTINGS.clear()
+        runbook_tools._PARSED_FILES.clear()
+
+    def test_fetch_service_runbook(self, tmp_path):
+        """Test that a service-specific runbook is found first"""
+        (tmp_path / "api").mkdir()
+        (tmp_path / "api" / "HighCPU.md").write_text("## Steps\n\n1. Scale up\n")
+        (tmp_path / "HighCPU.md").write_text("## Steps\n\n1. Generic\n")
+
+        source = LocalFileRunbookSource(base_path=str(tmp_path))
+        result = source.fetch_runbook({'labels': {'alertname': 'HighCPU', 'service': 'api'}})
+
+        assert result['found'] is True
+        assert result['steps'] == ['Scale up']
+        assert result['source'].endswith('HighCPU.md')
+
+    def test_fetch_missing_runbook(self, tmp_path):
+        """Test the result when no runbook file exists"""
+        source = LocalFileRunbookSource(base_path=str(tmp_path))
+        result = source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+
+        assert result['found'] is False
+        assert result['steps'] == []
+
+    def test_fetch_skips_unreadable_candidate(self, tmp_path):
+        """Test that a candidate that cannot be read falls through to the next one"""
+        (tmp_path / "api-HighCPU.md").mkdir()
+        (tmp_path / "HighCPU.md").write_text("## Steps\n\n1. Généric step\n", encoding='utf-8')
+
+        source = LocalFileRunbookSource(base_path=str(tmp_path))
+        result = source.fetch_runbook({'labels': {'alertname': 'HighCPU', 'service': 'api'}})
+
+        assert result['steps'] == ['Généric step']
+        assert result['source'] == f"Local file: {tmp_path / 'HighCPU.md'}"
+
+    def test_fetch_skips_unlisted_candidates(self, tmp_path):
+        """Test that only candidates present in the directory listing are opened"""
+        (tmp_path / "HighCPU.md").write_text("## Steps\n\n1. Generic\n")
+
+        source = LocalFileRunbookSource(base_path=str(tmp_path))
+        with patch('builtins.open', wraps=open) as mock_open:
+            result = source.fetch_runbook({'labels': {'alertname': 'HighCPU', 'service': 'api'}})
+
+        assert result['steps'] == ['Generic']
+        mock_open.assert_called_once()
+
+    def test_fetch_sees_new_runbook(self, tmp_path):
+        """Test that a cached directory listing is refreshed when a file is added"""
+        source = LocalFileRunbookSource(base_path=str(tmp_path))
+        assert source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})['found'] is False
+
+        (tmp_path / "HighCPU.md").write_text("## Steps\n\n1. Generic\n")
+        os.utime(tmp_path, ns=(0, os.stat(tmp_path).st_mtime_ns + 1))
+
+        assert source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})['found'] is True
+
+    def test_unchanged_file_not_parsed_again(self, tmp_path):
+        """Test that a runbook is only parsed again after the file changes"""
+        runbook = tmp_path / "HighCPU.md"
+        runbook.write_text("## Steps\n\n1. Scale up\n")
+        source = LocalFileRunbookSource(base_path=str(tmp_path))
+
+        with patch.object(runbook_tools, '_parse_markdown_steps', wraps=runbook_tools._parse_markdown_steps) as mock_parse:
+            source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+            source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+            assert mock_parse.call_count == 1
+
+            runbook.write_text("## Steps\n\n1. Scale out\n")
+            result = source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+
+        assert mock_parse.call_count == 2
+        assert result['steps'] == ['Scale out']
+
+    def test_fetch_without_alert_name(self, tmp_path):
+        """Test that an alert name is required"""
+        result = LocalFileRunbookSource(base_path=str(tmp_path)).fetch_runbook({'labels': {}})
+
+        assert result == {"found": False, "message": "No alert name provided"}
+
+    def test_parse_steps_without_github_source(self):
+        """Test that parsing local runbooks does not construct a GitHub source"""
+        with patch.object(runbook_tools, 'GitHubMarkdownRunbookSource') as mock_source:
+            steps = LocalFileRunbookSource(base_path='/runbooks')._parse_steps("## Steps\n\n1. Scale up\n")
+
+        assert steps == ['Scale up']
+        mock_source.assert_not_called()
+
+    def test_candidate_paths(self):
+        """Test that candidate paths are ordered most specific first and memoized"""
+        paths = LocalFileRunbookSource._candidate_paths('/runbooks', 'HighCPU', 'api')
+
+        assert paths == (
+            '/runbooks/api/HighCPU.md',
+            '/runbooks/api-HighCPU.md',
+            '/runbooks/HighCPU.md',
+            '/runbooks/runbooks.md'
+        )
+        assert LocalFileRunbookSource._candidate_paths('/runbooks', 'HighCPU', 'api') is paths
+
+    def test_candidate_paths_deduplicated(self):
+        """Test that an alert named like the generic runbook is only tried once"""
+        paths = LocalFileRunbookSource._candidate_paths('/runbooks', 'runbooks', '')
+
+        assert paths == ('/runbooks/runbooks.md',)
+
+    def test_candidate_paths_without_generic_fallback(self):
+        """Test that the generic runbook can be left out"""
+        paths = LocalFileRunbookSource._candidate_paths('/runbooks', 'HighCPU', '', False)
+
+        assert paths == ('/runbooks/HighCPU.md',)
+
+
+class TestGitHubMarkdownRunbookSource:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        runbook_tools._RUNBOOK_CACHE.clear()
+        runbook_tools._TREE_CACHE.clear()
+        runbook_tools._ETAG_CACHE.clear()
+        yield
+        runbook_tools._RUNBOOK_CACHE.clear()
+        runbook_tools._TREE_CACHE.clear()
+        runbook_tools._ETAG_CACHE.clear()
+
+    def test_fetch_runbook(self):
+        """Test fetching and decoding a runbook through the GitHub contents API"""
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {'type': 'file', 'content': 'IyMgU3RlcHMKCjEuIFNjYWxlIHVwCg=='}
+
+        with patch.object(runbook_tools._SESSION, 'get', return_value=response) as mock_get:
+            source = GitHubMarkdownRunbookSource(repo='org/runbooks')
+            result = source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+
+        assert result['found'] is True
+        assert result['steps'] == ['Scale up']
+        assert 'org/runbooks/contents/runbooks/HighCPU.md' in mock_get.call_args[0][0]
+
+    def test_fetch_runbook_cached(self):
+        """Test that a repeat alert is served from the runbook cache"""
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {'type': 'file', 'content': 'IyMgU3RlcHMKCjEuIFNjYWxlIHVwCg=='}
+
+        with patch.object(runbook_tools._SESSION, 'get', return_value=response) as mock_get:
+            source = GitHubMarkdownRunbookSource(repo='org/runbooks')
+            first = source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+            calls = mock_get.call_count
+            second = source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+
+        assert second == first
+        assert mock_get.call_count == calls
+
+    def test_cached_runbook_not_shared(self):
+        """Test that changing a returned runbook does not change the cached one"""
+        response = MagicMock()
+        response.status_code = 200
+        response.json.return_value = {'type': 'file', 'content': 'IyMgU3RlcHMKCjEuIFNjYWxlIHVwCg=='}
+
+        with patch.object(runbook_tools._SESSION, 'get', return_value=response):
+            source = GitHubMarkdownRunbookSource(repo='org/runbooks')
+            source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})['steps'].append('Injected')
+            result = source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+
+        assert result['steps'] == ['Scale up']
+
+    def test_fetch_runbook_uses_tree_index(self):
+        """Test that only candidate paths present in the repository tree are requested"""
+        tree = MagicMock()
+        tree.status_code = 200
+        tree.json.return_value = {
+            'truncated': False,
+            'tree': [
+                {'path': 'runbooks', 'type': 'tree'},
+                {'path': 'runbooks/HighCPU.md', 'type': 'blob'}
+            ]
+        }
+        content = MagicMock()
+        content.status_code = 200
+        content.json.return_value = {'type': 'file', 'content': 'IyMgU3RlcHMKCjEuIFNjYWxlIHVwCg=='}
+
+        def get(url, **kwargs):
+            return tree if '/git/trees/' in url else content
+
+        with patch.object(runbook_tools._SESSION, 'get', side_effect=get) as mock_get:
+            source = GitHubMarkdownRunbookSource(repo='org/runbooks')
+            result = source.fetch_runbook({'labels': {'alertname': 'HighCPU', 'service': 'api'}})
+
+        assert result['steps'] == ['Scale up']
+        urls = [call_args[0][0] for call_args in mock_get.call_args_list]
+        assert len(urls) == 2
+        assert 'contents/runbooks/HighCPU.md' in urls[1]
+
+    def test_fetch_revalidates_with_etag(self):
+        """Test that an unchanged runbook is revalidated and reused on a 304"""
+        ok = MagicMock()
+        ok.status_code = 200
+        ok.headers = {'ETag': '"abc"'}
+        ok.json.return_value = {'type': 'file', 'content': 'IyMgU3RlcHMKCjEuIFNjYWxlIHVwCg=='}
+        not_modified = MagicMock()
+        not_modified.status_code = 304
+
+        source = GitHubMarkdownRunbookSource(repo='org/runbooks')
+        with patch.object(runbook_tools._SESSION, 'get', return_value=ok):
+            source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+        runbook_tools._RUNBOOK_CACHE.clear()
+
+        with patch.object(runbook_tools._SESSION, 'get', return_value=not_modified) as mock_get:
+            result = source._fetch_path('runbooks/HighCPU.md')
+
+        assert result == ('runbooks/HighCPU.md', ['Scale up'])
+        assert mock_get.call_args[1]['headers']['If-None-Match'] == '"abc"'
+        assert 'If-None-Match' not in source.headers
+
+
+class TestGitHubPagesRunbookSource:
+    @pytest.fixture(autouse=True)
+    def clear_cache(self):
+        runbook_tools._RUNBOOK_CACHE.clear()
+        runbook_tools._ETAG_CACHE.clear()
+        yield
+        runbook_tools._RUNBOOK_CACHE.clear()
+        runbook_tools._ETAG_CACHE.clear()
+
+    def test_fetch_prefers_highest_priority_page(self):
+        """Test that concurrent probing still returns the most specific runbook"""
+        def get(url, **kwargs):
+            response = MagicMock()
+            response.status_code = 200 if url.endswith(('api/HighCPU.html', 'runbooks.html')) else 404
+            response.text = f"<ol><li>{url}</li></ol>"
+            return response
+
+        with patch.object(runbook_tools._SESSION, 'get', side_effect=get):
+            source = GitHubPagesRunbookSource(base_url='https://runbooks.example.com')
+            result = source.fetch_runbook({'labels': {'alertname': 'HighCPU', 'service': 'api'}})
+
+        assert result['found'] is True
+        assert result['source'] == 'HTML: https://runbooks.example.com/api/HighCPU.html'
+        assert result['steps'] == ['https://runbooks.example.com/api/HighCPU.html']
+
+    def test_fetch_revalidates_with_last_modified(self):
+        """Test that a page without an ETag is revalidated with its Last-Modified date"""
+        ok = MagicMock()
+        ok.status_code = 200
+        ok.headers = {'Last-Modified': 'Wed, 14 Oct 2026 10:00:00 GMT'}
+        ok.text = "<ol><li>Scale up</li></ol>"
+        not_modified = MagicMock()
+        not_modified.status_code = 304
+
+        source = GitHubPagesRunbookSource(base_url='https://runbooks.example.com')
+        with patch.object(runbook_tools._SESSION, 'get', return_value=ok):
+            source._fetch_url('https://runbooks.example.com/HighCPU.html')
+
+        with patch.object(runbook_tools._SESSION, 'get', return_value=not_modified) as mock_get:
+            result = source._fetch_url('https://runbooks.example.com/HighCPU.html')
+
+        assert result == ('https://runbooks.example.com/HighCPU.html', ['Scale up'])
+        assert mock_get.call_args[1]['headers'] == {'If-Modified-Since': 'Wed, 14 Oct 2026 10:00:00 GMT'}
+
+    def test_fetch_not_found(self):
+        """Test the result when no candidate page exists"""
+        response = MagicMock()
+        response.status_code = 404
+
+        with patch.object(runbook_tools._SESSION, 'get', return_value=response) as mock_get:
+            source = GitHubPagesRunbookSource(base_url='https://runbooks.example.com')
+            result = source.fetch_runbook({'labels': {'alertname': 'HighCPU'}})
+
+        assert result['found'] is False
+        assert mock_get.call_count == 3
+
+
+class TestRunbookFetchTool:
+    def test_sources_from_environment(self):
+        """Test that configured sources follow the environment after reload_env"""
+        env = {'RUNBOOK_GITHUB_REPO': 'org/runbooks', 'RUNBOOK_HTML_BASE_URL': 'https://runbooks.example.com'}
+        try:
+            with patch.dict(os.environ, env):
+                runbook_tools.reload_env()
+                sources = RunbookFetchTool().sources
+        finally:
+            runbook_tools.reload_env()
+
+        assert [type(source) for source in sources] == [
+            LocalFileRunbookSource, GitHubMarkdownRunbookSource, GitHubPagesRunbookSource
+        ]
+        assert sources[1].repo == 'org/runbooks'
+
+    def test_environment_set_after_import(self):
+        """Test that settings loaded after import, e.g. from a .env file, are picked up"""
+        runbook_tools._ENV.clear()
+        try:
+            with patch.dict(os.environ, {'RUNBOOK_GITHUB_REPO': 'org/runbooks', 'RUNBOOK_LOCAL_PATH': '/srv/runbooks'}):
+                sources = RunbookFetchTool().sources
+        finally:
+            runbook_tools._ENV.clear()
+
+        assert sources[0].base_path == '/srv/runbooks'
+        assert isinstance(sources[1], GitHubMarkdownRunbookSource)
+        assert sources[1].repo == 'org/runbooks'
+
+    @pytest.fixture
+    def fetch_tool(self):
+        tool = RunbookFetchTool()
+        tool.sources = [MagicMock(), MagicMock(), MagicMock()]
+        return tool
+
+    def test_fetch_prefers_first_source(self, fetch_tool):
+        """Test that the highest priority source that finds a runbook wins"""
+        fetch_tool.sources[0].fetch_runbook.return_value = {'found': False}
+        fetch_tool.sources[1].fetch_runbook.return_value = {'found': True, 'source': 'second'}
+        fetch_tool.sources[2].fetch_runbook.return_value = {'found': True, 'source': 'third'}
+
+        assert fetch_tool.fetch({'labels': {'alertname': 'HighCPU'}})['source'] == 'second'
+
+    def test_local_hit_skips_network_sources(self, fetch_tool, tmp_path):
+        """Test that network sources are not queried when a local runbook is found"""
+        (tmp_path / "HighCPU.md").write_text("## Steps\n\n1. Scale up\n")
+        fetch_tool.sources[0] = LocalFileRunbookSource(base_path=str(tmp_path))
+
+        result = fetch_tool.fetch({'labels': {'alertname': 'HighCPU'}})
+        async_result = asyncio.run(fetch_tool.fetch_async({'labels': {'alertname': 'HighCPU'}}))
+
+        assert result['steps'] == async_result['steps'] == ['Scale up']
+        fetch_tool.sources[1].fetch_runbook.assert_not_called()
+        fetch_tool.sources[2].fetch_runbook.assert_not_called()
+
+    def test_local_miss_queries_network_sources(self, fetch_tool, tmp_path):
+        """Test that network sources are queried when no local runbook exists"""
+        fetch_tool.sources[0] = LocalFileRunbookSource(base_path=str(tmp_path))
+        fetch_tool.sources[1].fetch_runbook.return_value = {'found': False}
+        fetch_tool.sources[2].fetch_runbook.return_value = {'found': True, 'source': 'third'}
+
+        assert fetch_tool.fetch({'labels': {'alertname': 'HighCPU'}})['source'] == 'third'
+
+    def test_fetch_skips_failing_source(self, fetch_tool):
+        """Test that a source raising an error does not stop the others"""
+        fetch_tool.sources[0].fetch_runbook.side_effect = Exception("boom")
+        fetch_tool.sources[1].fetch_runbook.return_value = {'found': False}
+        fetch_tool.sources[2].fetch_runbook.return_value = {'found': True, 'source': 'third'}
+
+        assert fetch_tool.fetch({'labels': {'alertname': 'HighCPU'}})['source'] == 'third'
+
+    def test_fetch_async(self, fetch_tool):
+        """Test the awaitable fetch with the same priority rules"""
+        fetch_tool.sources[0].fetch_runbook.return_value = {'found': False}
+        fetch_tool.sources[1].fetch_runbook.return_value = {'found': True, 'source': 'second'}
+        fetch_tool.sources[2].fetch_runbook.return_value = {'found': True, 'source': 'third'}
+
+        result = asyncio.run(fetch_tool.fetch_async({'labels': {'alertname': 'HighCPU'}}))
+
+        assert result['source'] == 'second'
+
+    def test_fetch_async_not_found(self, fetch_tool):
+        """Test the generic result when no source finds a runbook"""
+        for source in fetch_tool.sources:
+            source.fetch_runbook.return_value = {'found': False}
+
+        result = asyncio.run(fetch_tool.fetch_async({'labels': {'alertname': 'HighCPU', 'service': 'api'}}))
+
+        assert result == {
+            "alertName": "HighCPU",
+            "service": "api",
+            "steps": [],
+            "found": False,
+            "message": "No runbook found in any configured source"
+        }